@@ -1,20 +1,395 @@
 import cv2
 import os
+import sys
+import csv
+import atexit
+import json
+import time
+import queue
+import argparse
+import tempfile
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
 import numpy as np
-import pandas as pd
 from datetime import datetime
-from sklearn.neighbors import KNeighborsClassifier
-import pickle
+from sklearn.neighbors import BallTree
 
 # Dataset directory
 DATASET_DIR = 'dataset/'
 attendance_file = 'attendance.csv'
-model_file = 'knn_model.pkl'
+MODEL_DIR = 'model/'
+CASCADE_FILE = cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
+FACE_SIZE = (100, 100)
+DETECT_SCALE_FACTOR = 1.3
+DETECT_MIN_NEIGHBORS = 5
+
+# Faces are stored as PCA projections of their pixels. PCA_SAMPLE caps how
+# many images the components are fitted on so training stays fast for large
+# rosters; every image is still projected and indexed.
+PCA_COMPONENTS = 64
+PCA_SAMPLE = 2000
+INDEX_BACKEND = 'flat'
+IVF_NPROBE = 4
+
+# Faces whose nearest training image is further away than this (Euclidean
+# distance in feature space, on the same 0-255 pixel scale) are labelled
+# unknown instead of being forced onto the closest student. None always uses
+# the nearest label.
+UNKNOWN_THRESHOLD = None
+UNKNOWN_LABEL = 'Unknown'
+
+# Tracking: full detection runs every TRACK_DETECT_EVERY frames, or sooner when
+# the scene changes by more than TRACK_MOTION_THRESHOLD (mean grey-level
+# difference of a thumbnail). In between, faces are followed by template
+# matching on TRACK_TEMPLATE_SIZE px thumbnails and keep their identity;
+# a track is re-identified every TRACK_REIDENTIFY_EVERY detections.
+TRACK_DETECT_EVERY = 5
+TRACK_MOTION_THRESHOLD = 8.0
+TRACK_IOU_MATCH = 0.3
+TRACK_MIN_SCORE = 0.5
+TRACK_SEARCH_MARGIN = 0.5
+TRACK_TEMPLATE_SIZE = 32
+TRACK_REIDENTIFY_EVERY = 10
 
 # Ensure dataset and attendance file exist
 os.makedirs(DATASET_DIR, exist_ok=True)
 if not os.path.exists(attendance_file):
-    pd.DataFrame(columns=['Name', 'Time']).to_csv(attendance_file, index=False)
+    with open(attendance_file, 'w', newline='') as f:
+        csv.writer(f, lineterminator='\n').writerow(['Name', 'Time'])
+
+# The Haar cascade is loaded once per thread and reused for every frame.
+# CascadeClassifier is not safe to share between threads that call
+# detectMultiScale concurrently, so the pipelined workers each get their own.
+_local = threading.local()
+
+def get_cascade():
+    cascade = getattr(_local, 'cascade', None)
+    if cascade is None:
+        cascade = cv2.CascadeClassifier(CASCADE_FILE)
+        _local.cascade = cascade
+    return cascade
+
+def detect_faces(gray, scale_factor=DETECT_SCALE_FACTOR, min_neighbors=DETECT_MIN_NEIGHBORS):
+    return get_cascade().detectMultiScale(gray, scale_factor, min_neighbors)
+
+# Rolling FPS and per-stage latency figures, shared by the capture and worker threads
+class PipelineStats:
+    def __init__(self, window=100):
+        self.window = window
+        self.lock = threading.Lock()
+        self.stages = {}
+        self.frames = deque(maxlen=window)
+
+    def record(self, stage, seconds):
+        with self.lock:
+            self.stages.setdefault(stage, deque(maxlen=self.window)).append(seconds)
+
+    def frame_done(self):
+        with self.lock:
+            self.frames.append(time.perf_counter())
+
+    def fps(self):
+        with self.lock:
+            if len(self.frames) < 2:
+                return 0.0
+            return (len(self.frames) - 1) / (self.frames[-1] - self.frames[0])
+
+    def summary(self):
+        parts = [f"FPS {self.fps():.1f}"]
+        with self.lock:
+            for stage, samples in self.stages.items():
+                parts.append(f"{stage} {1000 * sum(samples) / len(samples):.1f}ms")
+        return " | ".join(parts)
+
+# Bounded ring buffer between the capture thread and the detection workers.
+# When the workers fall behind the oldest frame is dropped, so they always
+# work on recent frames instead of an ever-growing backlog.
+class FrameRing:
+    def __init__(self, capacity):
+        self.frames = deque(maxlen=capacity)
+        self.cond = threading.Condition()
+        self.closed = False
+        self.dropped = 0
+
+    def put(self, item):
+        with self.cond:
+            if len(self.frames) == self.frames.maxlen:
+                self.dropped += 1
+            self.frames.append(item)
+            self.cond.notify()
+
+    def get(self):
+        with self.cond:
+            while not self.frames and not self.closed:
+                self.cond.wait()
+            if not self.frames:
+                return None
+            return self.frames.popleft()
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+# Squared Euclidean distances between every row of a and every row of b
+def squared_distances(a, b, b_sq_norms=None):
+    if b_sq_norms is None:
+        b_sq_norms = np.einsum('ij,ij->i', b, b)
+    d2 = np.einsum('ij,ij->i', a, a)[:, None] - 2 * (a @ b.T) + b_sq_norms
+    return np.maximum(d2, 0)
+
+# Write an array next to its destination and swap it in, so a process that has
+# the old file memory-mapped keeps a consistent view
+def save_array(path, array):
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        np.save(f, array)
+    os.replace(tmp, path)
+
+# Fit PCA on (a sample of) the flattened face pixels
+def fit_pca(pixels, n_components, sample=PCA_SAMPLE, seed=0):
+    if len(pixels) > sample:
+        rng = np.random.default_rng(seed)
+        pixels = pixels[np.sort(rng.choice(len(pixels), sample, replace=False))]
+    rows = pixels.astype(np.float32)
+    mean = rows.mean(axis=0)
+    rows -= mean
+    # With fewer samples than pixels it is far cheaper to take the eigenvectors
+    # of the (samples x samples) Gram matrix and map them back to pixel space
+    # than to run an SVD over the full pixel matrix
+    eigenvalues, eigenvectors = np.linalg.eigh(rows @ rows.T)
+    top = np.argsort(eigenvalues)[::-1][:n_components]
+    top = top[eigenvalues[top] > 1e-6 * max(eigenvalues[top[0]], 1e-12)]
+    components = (eigenvectors[:, top].T @ rows) / np.sqrt(eigenvalues[top])[:, None]
+    if len(components) == 0:
+        # A single image (or identical ones) has no variance to fit; keep one
+        # axis, the mean face direction, so the features are never empty
+        norm = np.linalg.norm(mean)
+        components = mean[None, :] / norm if norm > 0 else np.eye(1, len(mean))
+    return mean, np.ascontiguousarray(components, dtype=np.float32)
+
+# Plain k-means, used to build the coarse quantizer of the IVF index
+def kmeans(data, k, iterations=10, seed=0):
+    rng = np.random.default_rng(seed)
+    centroids = np.array(data[rng.choice(len(data), k, replace=False)], dtype=np.float32)
+    for _ in range(iterations):
+        assign = squared_distances(data, centroids).argmin(axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, data)
+        counts = np.bincount(assign, minlength=k)
+        filled = counts > 0
+        centroids[filled] = sums[filled] / counts[filled, None]
+    return centroids
+
+# Nearest-neighbour indexes over the float32 feature matrix. Each backend can
+# be built from features, saved next to them and loaded back, and answers
+# search(queries) with the distance and row of the closest stored face.
+
+# Exact search: one matrix product against every stored face
+class FlatIndex:
+    name = 'flat'
+
+    def __init__(self, features):
+        self.features = features
+        self.sq_norms = np.einsum('ij,ij->i', features, features)
+
+    @classmethod
+    def build(cls, features):
+        return cls(features)
+
+    @classmethod
+    def load(cls, features, model_dir):
+        return cls(features)
+
+    def save(self, model_dir):
+        pass
+
+    def refresh(self, features):
+        return FlatIndex(features)
+
+    def search(self, queries):
+        d2 = squared_distances(queries, self.features, self.sq_norms)
+        indices = d2.argmin(axis=1)
+        return np.sqrt(d2[np.arange(len(indices)), indices]), indices
+
+# Exact search through a ball tree, rebuilt from the features on load
+class BallTreeIndex:
+    name = 'balltree'
+
+    def __init__(self, features):
+        self.tree = BallTree(features)
+
+    @classmethod
+    def build(cls, features):
+        return cls(features)
+
+    @classmethod
+    def load(cls, features, model_dir):
+        return cls(features)
+
+    def save(self, model_dir):
+        pass
+
+    def refresh(self, features):
+        return BallTreeIndex(features)
+
+    def search(self, queries):
+        distances, indices = self.tree.query(queries, k=1)
+        return distances[:, 0], indices[:, 0]
+
+# Approximate search: faces are bucketed by their nearest k-means centroid and
+# a query only scans the IVF_NPROBE closest buckets
+class IVFIndex:
+    name = 'ivf'
+
+    def __init__(self, features, centroids, order, offsets, nprobe=IVF_NPROBE):
+        self.features = features
+        self.centroids = centroids
+        self.order = order
+        self.offsets = offsets
+        self.nprobe = min(nprobe, len(centroids))
+
+    @classmethod
+    def build(cls, features):
+        n_lists = max(1, int(np.sqrt(len(features))))
+        return cls.from_centroids(features, kmeans(features, n_lists))
+
+    @classmethod
+    def from_centroids(cls, features, centroids):
+        assign = squared_distances(features, centroids).argmin(axis=1)
+        order = np.argsort(assign, kind='stable')
+        offsets = np.searchsorted(assign[order], np.arange(len(centroids) + 1))
+        return cls(features, centroids, order, offsets)
+
+    @classmethod
+    def load(cls, features, model_dir):
+        centroids, order, offsets = (np.load(os.path.join(model_dir, f'ivf_{name}.npy'), mmap_mode='r')
+                                     for name in ('centroids', 'order', 'offsets'))
+        return cls(features, centroids, order, offsets)
+
+    def save(self, model_dir):
+        save_array(os.path.join(model_dir, 'ivf_centroids.npy'), self.centroids)
+        save_array(os.path.join(model_dir, 'ivf_order.npy'), self.order)
+        save_array(os.path.join(model_dir, 'ivf_offsets.npy'), self.offsets)
+
+    # Re-bucket a changed feature matrix against the existing centroids,
+    # which is much cheaper than running k-means again
+    def refresh(self, features):
+        return IVFIndex.from_centroids(features, np.array(self.centroids))
+
+    def search(self, queries):
+        probes = np.argsort(squared_distances(queries, self.centroids), axis=1)[:, :self.nprobe]
+        distances = np.empty(len(queries), dtype=np.float32)
+        indices = np.empty(len(queries), dtype=np.int64)
+        for i, lists in enumerate(probes):
+            candidates = np.concatenate([self.order[self.offsets[c]:self.offsets[c + 1]] for c in lists])
+            if len(candidates) == 0:
+                candidates = np.arange(len(self.features))
+            d2 = squared_distances(queries[i:i + 1], self.features[candidates])[0]
+            best = d2.argmin()
+            distances[i] = np.sqrt(d2[best])
+            indices[i] = candidates[best]
+        return distances, indices
+
+INDEX_BACKENDS = {index.name: index for index in (FlatIndex, BallTreeIndex, IVFIndex)}
+
+# Trained recogniser: PCA projection, float32 feature store and search index.
+# Arrays are saved as .npy files in MODEL_DIR and memory-mapped on load, so
+# startup cost does not grow with the roster.
+# Each feature row remembers the image path and mtime it was encoded from,
+# which doubles as the cache that lets train_model() skip unchanged images.
+# n_components is the requested PCA size; the fit may keep fewer.
+class FaceModel:
+    def __init__(self, mean, components, features, labels, sources, mtimes, index, pca_images, face_size=FACE_SIZE,
+                 n_components=PCA_COMPONENTS):
+        self.mean = mean
+        self.components = components
+        self.features = features
+        self.labels = labels
+        self.sources = sources
+        self.mtimes = mtimes
+        self.index = index
+        self.pca_images = pca_images
+        self.face_size = tuple(face_size)
+        self.n_components = n_components
+
+    @classmethod
+    def fit(cls, pixels, labels, sources, mtimes, n_components=PCA_COMPONENTS, backend=INDEX_BACKEND,
+            face_size=FACE_SIZE):
+        mean, components = fit_pca(pixels, n_components)
+        model = cls(mean, components, None, np.asarray(labels), np.asarray(sources),
+                    np.asarray(mtimes, dtype=np.int64), None, len(pixels), face_size, n_components)
+        model.features = model.encode(pixels)
+        model.index = INDEX_BACKENDS[backend].build(model.features)
+        return model
+
+    # Drop the rows not selected by keep and append newly encoded images,
+    # reusing the fitted PCA projection
+    def update(self, keep, pixels, labels, sources, mtimes):
+        # Copy everything out of the memory-mapped files before they are replaced
+        self.mean = np.array(self.mean)
+        self.components = np.array(self.components)
+        self.features = np.concatenate([self.features[keep], self.encode(pixels)])
+        self.labels = np.concatenate([self.labels[keep], np.asarray(labels, dtype=str)])
+        self.sources = np.concatenate([self.sources[keep], np.asarray(sources, dtype=str)])
+        self.mtimes = np.concatenate([self.mtimes[keep], np.asarray(mtimes, dtype=np.int64)])
+        self.index = self.index.refresh(self.features)
+
+    # Project flattened uint8 face pixels into feature space, in chunks to
+    # bound the float32 temporaries
+    def encode(self, pixels, chunk=4096):
+        features = np.empty((len(pixels), len(self.components)), dtype=np.float32)
+        for start in range(0, len(pixels), chunk):
+            rows = pixels[start:start + chunk].astype(np.float32) - self.mean
+            features[start:start + chunk] = rows @ self.components.T
+        return features
+
+    # Label every face of a batch, applying the unknown-face threshold
+    def predict(self, pixels, threshold=UNKNOWN_THRESHOLD):
+        if len(pixels) == 0:
+            return []
+        distances, indices = self.index.search(self.encode(pixels))
+        names = [str(name) for name in self.labels[indices]]
+        if threshold is None:
+            return names
+        return [name if dist <= threshold else UNKNOWN_LABEL
+                for name, dist in zip(names, distances)]
+
+    def save(self, model_dir=MODEL_DIR):
+        os.makedirs(model_dir, exist_ok=True)
+        save_array(os.path.join(model_dir, 'pca_mean.npy'), self.mean)
+        save_array(os.path.join(model_dir, 'pca_components.npy'), self.components)
+        save_array(os.path.join(model_dir, 'features.npy'), self.features)
+        save_array(os.path.join(model_dir, 'labels.npy'), self.labels)
+        save_array(os.path.join(model_dir, 'sources.npy'), self.sources)
+        save_array(os.path.join(model_dir, 'mtimes.npy'), self.mtimes)
+        self.index.save(model_dir)
+        meta = {'backend': self.index.name, 'face_size': list(self.face_size), 'faces': len(self.labels),
+                'pca_images': self.pca_images, 'n_components': self.n_components}
+        with open(os.path.join(model_dir, 'meta.json'), 'w') as f:
+            json.dump(meta, f)
+
+    @classmethod
+    def load(cls, model_dir=MODEL_DIR, backend=None):
+        with open(os.path.join(model_dir, 'meta.json')) as f:
+            meta = json.load(f)
+        def array(name):
+            return np.load(os.path.join(model_dir, name), mmap_mode='r')
+        features = array('features.npy')
+        backend = backend or meta['backend']
+        if backend == meta['backend']:
+            index = INDEX_BACKENDS[backend].load(features, model_dir)
+        else:
+            index = INDEX_BACKENDS[backend].build(features)
+        return cls(array('pca_mean.npy'), array('pca_components.npy'), features, array('labels.npy'),
+                   array('sources.npy'), array('mtimes.npy'), index, meta['pca_images'], meta['face_size'],
+                   meta.get('n_components', PCA_COMPONENTS))
+
+    @staticmethod
+    def exists(model_dir=MODEL_DIR):
+        return os.path.exists(os.path.join(model_dir, 'meta.json'))
 
 # Function to capture a student's face and save it
 def capture_face(student_name):
@@ -28,7 +403,7 @@ def capture_face(student_name):
             break
 
         gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        faces = cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_frontalface_default.xml").detectMultiScale(gray, 1.3, 5)
+        faces = detect_faces(gray)
 
         for (x, y, w, h) in faces:
             face = frame[y:y + h, x:x + w]
@@ -38,6 +413,7 @@ def capture_face(student_name):
             print(f"Image saved for {student_name}.")
             cap.release()
             cv2.destroyAllWindows()
+            train_model(students=[student_name])
             return
 
         cv2.imshow('Capture Face', frame)
@@ -47,90 +423,719 @@ def capture_face(student_name):
     cap.release()
     cv2.destroyAllWindows()
 
-# Function to train the KNN model
-def train_model():
-    encodings = []
-    labels = []
-
-    for student in os.listdir(DATASET_DIR):
+# List the images in the dataset as {path: (student, mtime_ns)}.
+# Only the given student folders are scanned when students is set.
+def scan_dataset(students=None):
+    images = {}
+    for student in students if students is not None else os.listdir(DATASET_DIR):
         student_folder = os.path.join(DATASET_DIR, student)
-        for img_name in os.listdir(student_folder):
-            img_path = os.path.join(student_folder, img_name)
-            img = cv2.imread(img_path)
-            gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-            face = cv2.resize(gray, (100, 100)).flatten()
-            encodings.append(face)
-            labels.append(student)
+        if not os.path.isdir(student_folder):
+            continue
+        for entry in os.scandir(student_folder):
+            if entry.is_file():
+                images[entry.path] = (student, entry.stat().st_mtime_ns)
+    return images
+
+# Read one image as a flattened grayscale face, or None if it can't be decoded
+def load_face(img_path, face_size=FACE_SIZE):
+    img = cv2.imread(img_path)
+    if img is None:
+        return None
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    return cv2.resize(gray, face_size).ravel()
+
+# Process pool task: decode a shard of images straight into the shared pixel
+# buffer and return only which of them could be read
+def encode_shard(shm_name, shape, start, paths, face_size):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        pixels = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf)
+        ok = []
+        for i, img_path in enumerate(paths):
+            face = load_face(img_path, face_size)
+            if face is not None:
+                pixels[start + i] = face
+            ok.append(face is not None)
+        del pixels
+        return start, ok
+    finally:
+        shm.close()
+
+def report_progress(done, total, start):
+    rate = done / max(time.perf_counter() - start, 1e-9)
+    print(f"\rEncoded {done}/{total} images ({rate:.0f} images/sec)", end='', flush=True)
+
+# Read images from disk as one matrix of flattened grayscale faces.
+# With workers > 1 the paths are sharded across a process pool that writes into
+# shared memory. Returns the matrix and the paths that could actually be decoded.
+def encode_images(paths, workers=1, face_size=FACE_SIZE, shard_size=256):
+    shape = (len(paths), face_size[0] * face_size[1])
+    ok = np.zeros(len(paths), dtype=bool)
+    start = time.perf_counter()
+
+    if workers > 1 and len(paths) > shard_size:
+        shm = shared_memory.SharedMemory(create=True, size=shape[0] * shape[1])
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [pool.submit(encode_shard, shm.name, shape, i, paths[i:i + shard_size], face_size)
+                           for i in range(0, len(paths), shard_size)]
+                done = 0
+                for future in as_completed(futures):
+                    first, shard_ok = future.result()
+                    ok[first:first + len(shard_ok)] = shard_ok
+                    done += len(shard_ok)
+                    report_progress(done, len(paths), start)
+            pixels = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf)[ok].copy()
+        finally:
+            shm.close()
+            shm.unlink()
+    else:
+        pixels = np.empty(shape, dtype=np.uint8)
+        for i, img_path in enumerate(paths):
+            face = load_face(img_path, face_size)
+            if face is not None:
+                pixels[i] = face
+                ok[i] = True
+            if (i + 1) % 500 == 0:
+                report_progress(i + 1, len(paths), start)
+        pixels = pixels[ok]
+    if len(paths) >= 500:
+        report_progress(len(paths), len(paths), start)
+        print()
+
+    for img_path in np.asarray(paths)[~ok]:
+        print(f"Skipping unreadable image {img_path}.")
+    return pixels, [p for p, good in zip(paths, ok) if good]
+
+# Function to train the face model.
+# By default only new or modified images are encoded and merged into the saved
+# model; rebuild=True re-reads the whole dataset and refits PCA. The projection
+# is also refitted while it was fitted on no more images than components, and
+# once the dataset has more than doubled since it was fitted; otherwise new
+# students are projected onto the existing components.
+# n_components, backend and face_size default to those of the saved model; a
+# different backend only re-indexes the features.
+def train_model(n_components=None, backend=None, rebuild=False, students=None, workers=1,
+                face_size=None, model_dir=MODEL_DIR):
+    start = time.perf_counter()
+    face_size = tuple(face_size) if face_size else None
+
+    if not rebuild and FaceModel.exists(model_dir):
+        model = FaceModel.load(model_dir)
+        images = scan_dataset(students)
+        # Rows outside the scanned students are untouched; rows inside are kept
+        # only if their image still exists with the same mtime
+        in_scope = np.ones(len(model.labels), dtype=bool) if students is None else np.isin(model.labels, students)
+        unchanged = np.array([images.get(str(path), (None, None))[1] == mtime
+                              for path, mtime in zip(model.sources, model.mtimes)], dtype=bool)
+        keep = ~in_scope | unchanged
+        cached = set(model.sources[keep & in_scope].tolist())
+        changed = sorted(path for path in images if path not in cached)
+        n_components = n_components or model.n_components
+        backend = backend or model.index.name
+        face_size = face_size or model.face_size
+        stale = bool(changed) or not keep.all()
+
+        if model.face_size != face_size:
+            print("Face size differs from the saved model, rebuilding.")
+        elif n_components != model.n_components:
+            print("PCA components differ from the saved model, rebuilding.")
+        elif not stale and backend == model.index.name:
+            print("Model is already up to date.")
+            return
+        elif stale and model.pca_images <= model.n_components:
+            print("Model was fitted on too few images, rebuilding.")
+        elif keep.sum() + len(changed) > 2 * model.pca_images and model.pca_images < PCA_SAMPLE:
+            print("Dataset has more than doubled since the model was fitted, rebuilding.")
+        else:
+            pixels, paths = encode_images(changed, workers, face_size)
+            if keep.any() or paths:
+                model.update(keep, pixels, [images[p][0] for p in paths], paths, [images[p][1] for p in paths])
+                if backend != model.index.name:
+                    model.index = INDEX_BACKENDS[backend].build(model.features)
+                model.save(model_dir)
+                print(f"Model updated: {len(paths)} images encoded, {int((~keep).sum())} removed, "
+                      f"{backend} index in {1000 * (time.perf_counter() - start):.0f}ms")
+                return
+
+    face_size = face_size or FACE_SIZE
+    images = scan_dataset()
+    pixels, paths = encode_images(sorted(images), workers, face_size)
+    if not paths:
+        print("No images found in the dataset. Add a student first.")
+        return
+    FaceModel.fit(pixels, [images[p][0] for p in paths], paths, [images[p][1] for p in paths],
+                  n_components or PCA_COMPONENTS, backend or INDEX_BACKEND, face_size).save(model_dir)
+    print(f"Model trained and saved! {len(paths)} images in {time.perf_counter() - start:.2f}s")
+
+# Attendance ledger: the names already marked are loaded from attendance.csv
+# once and kept in memory, so checking a name is a dict lookup. New marks are
+# appended to the file by a background writer, a batch at a time, and fsynced
+# so a crash loses at most the batch that was still being collected.
+class AttendanceLedger:
+    def __init__(self, path=attendance_file, batch_size=100, flush_interval=0.5):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.lock = threading.Lock()
+        self.marked = self._load()
+        self.pending = queue.Queue()
+        self.file = open(path, 'a', newline='')
+        self.writer = threading.Thread(target=self._write_loop, daemon=True)
+        self.writer.start()
+
+    def _load(self):
+        marked = {}
+        if os.path.exists(self.path):
+            # A crash in the middle of a write can leave a partial last line;
+            # cut it off so the next append starts on a fresh line. A file
+            # with no newline at all is a lone header and just gets one.
+            with open(self.path, 'rb+') as f:
+                data = f.read()
+                if data and not data.endswith(b'\n'):
+                    if b'\n' in data:
+                        f.truncate(data.rfind(b'\n') + 1)
+                    else:
+                        f.write(b'\n')
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+            with open(self.path, 'w', newline='') as f:
+                csv.writer(f, lineterminator='\n').writerow(['Name', 'Time'])
+            return marked
+
+        with open(self.path, newline='') as f:
+            for row in csv.DictReader(f):
+                if row.get('Name'):
+                    marked.setdefault(row['Name'], row.get('Time'))
+        return marked
+
+    # Mark a name present; returns False if it was already marked
+    def mark(self, name):
+        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        with self.lock:
+            if name in self.marked:
+                return False
+            self.marked[name] = timestamp
+        self.pending.put((name, timestamp))
+        return True
+
+    def _write_loop(self):
+        writer = csv.writer(self.file, lineterminator='\n')
+        while True:
+            item = self.pending.get()
+            batch = []
+            deadline = time.monotonic() + self.flush_interval
+            while item is not None:
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self.pending.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+            if batch:
+                writer.writerows(batch)
+                self.file.flush()
+                os.fsync(self.file.fileno())
+            if item is None:
+                return
+
+    # Flush everything still queued and stop the writer
+    def close(self):
+        if self.writer.is_alive():
+            self.pending.put(None)
+            self.writer.join()
+        self.file.close()
 
-    knn = KNeighborsClassifier(n_neighbors=1)
-    knn.fit(encodings, labels)
+_ledger = None
+_ledger_lock = threading.Lock()
 
-    with open(model_file, 'wb') as f:
-        pickle.dump(knn, f)
-    print("Model trained and saved!")
+def get_ledger():
+    global _ledger
+    with _ledger_lock:
+        if _ledger is None:
+            _ledger = AttendanceLedger()
+            atexit.register(_ledger.close)
+        return _ledger
 
 # Function to mark attendance
 def mark_attendance(name):
-    now = datetime.now()
-    timestamp = now.strftime('%Y-%m-%d %H:%M:%S')
-    
-    # Ensure file is initialized properly
-    try:
-        df = pd.read_csv(attendance_file)
-    except (pd.errors.EmptyDataError, FileNotFoundError):
-        df = pd.DataFrame(columns=['Name', 'Time'])
-
-    if name not in df['Name'].values:
-        new_entry = pd.DataFrame({'Name': [name], 'Time': [timestamp]})
-        df = pd.concat([df, new_entry], ignore_index=True)
-        df.to_csv(attendance_file, index=False)
+    if get_ledger().mark(name):
         print(f'Attendance marked for {name}.')
     else:
         print(f'{name} already marked.')
 
-# Real-time face recognition and attendance
-def recognize_faces():
-    with open(model_file, 'rb') as f:
-        knn = pickle.load(f)
+# Crop and resize every detected face into one (n_faces, width * height) matrix
+def face_matrix(gray, faces, face_size=FACE_SIZE):
+    batch = np.empty((len(faces), face_size[0] * face_size[1]), dtype=np.uint8)
+    for i, (x, y, w, h) in enumerate(faces):
+        batch[i] = cv2.resize(gray[y:y + h, x:x + w], face_size).ravel()
+    return batch
+
+# Detect and identify every face in a frame, recording per-stage latency
+def process_frame(model, frame, stats, threshold=UNKNOWN_THRESHOLD):
+    start = time.perf_counter()
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    faces = detect_faces(gray)
+    detected = time.perf_counter()
+
+    names = model.predict(face_matrix(gray, faces, model.face_size), threshold)
+
+    stats.record('detect', detected - start)
+    stats.record('predict', time.perf_counter() - detected)
+    return list(zip(faces, names))
+
+def box_iou(a, b):
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    iw = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    ih = max(0, min(ay + ah, by + bh) - max(ay, by))
+    inter = iw * ih
+    return inter / float(aw * ah + bw * bh - inter) if inter else 0.0
+
+class Track:
+    def __init__(self, box):
+        self.box = box
+        self.name = None
+        self.hits = 0
+        self.scale = 1.0
+        self.template = None
+
+    # Keep a small grayscale thumbnail of the face to follow it by
+    def set_template(self, gray):
+        x, y, w, h = self.box
+        self.scale = min(1.0, TRACK_TEMPLATE_SIZE / max(w, h))
+        self.template = cv2.resize(gray[y:y + h, x:x + w], None, fx=self.scale, fy=self.scale,
+                                   interpolation=cv2.INTER_AREA)
+
+# Stateful replacement for process_frame() on a single stream of frames:
+# detects only every few frames or on motion and follows the known faces with
+# a cheap template tracker in between, reusing the identity already assigned.
+class FaceTracker:
+    def __init__(self, model, threshold=UNKNOWN_THRESHOLD, detect_every=TRACK_DETECT_EVERY,
+                 motion_threshold=TRACK_MOTION_THRESHOLD):
+        self.model = model
+        self.threshold = threshold
+        self.detect_every = detect_every
+        self.motion_threshold = motion_threshold
+        self.tracks = []
+        self.reference = None
+        self.frames_since_detect = detect_every
+
+    def process(self, frame, stats):
+        start = time.perf_counter()
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        thumb = cv2.resize(gray, (64, 48), interpolation=cv2.INTER_AREA)
+        moved = self.reference is None or cv2.absdiff(thumb, self.reference).mean() > self.motion_threshold
+
+        self.frames_since_detect += 1
+        if moved or self.frames_since_detect >= self.detect_every:
+            self.reference = thumb
+            self.frames_since_detect = 0
+            self._detect(gray, stats, start)
+        else:
+            self._follow(gray)
+            stats.record('track', time.perf_counter() - start)
+        return [(track.box, track.name) for track in self.tracks]
+
+    # Run the detector, carry identities over to the detections that overlap
+    # an existing track and classify only the new (or due) faces in one batch
+    def _detect(self, gray, stats, start):
+        faces = [tuple(int(v) for v in face) for face in detect_faces(gray)]
+        detected = time.perf_counter()
+
+        pairs = sorted(((box_iou(track.box, face), t, f)
+                        for t, track in enumerate(self.tracks) for f, face in enumerate(faces)), reverse=True)
+        matched = {}
+        used = set()
+        for iou, t, f in pairs:
+            if iou < TRACK_IOU_MATCH:
+                break
+            if t not in used and f not in matched:
+                used.add(t)
+                matched[f] = self.tracks[t]
+
+        tracks = []
+        to_identify = []
+        for f, face in enumerate(faces):
+            track = matched.get(f) or Track(face)
+            track.box = face
+            track.hits += 1
+            track.set_template(gray)
+            if track.name in (None, UNKNOWN_LABEL) or track.hits % TRACK_REIDENTIFY_EVERY == 0:
+                to_identify.append(track)
+            tracks.append(track)
+
+        if to_identify:
+            boxes = [track.box for track in to_identify]
+            names = self.model.predict(face_matrix(gray, boxes, self.model.face_size), self.threshold)
+            for track, name in zip(to_identify, names):
+                track.name = name
+        self.tracks = tracks
+
+        stats.record('detect', detected - start)
+        stats.record('predict', time.perf_counter() - detected)
+
+    # Move every track to the best template match around its last position;
+    # tracks whose match is too weak are dropped until the next detection
+    def _follow(self, gray):
+        height, width = gray.shape
+        alive = []
+        for track in self.tracks:
+            x, y, w, h = track.box
+            mx, my = int(w * TRACK_SEARCH_MARGIN), int(h * TRACK_SEARCH_MARGIN)
+            x0, y0 = max(x - mx, 0), max(y - my, 0)
+            x1, y1 = min(x + w + mx, width), min(y + h + my, height)
+            window = cv2.resize(gray[y0:y1, x0:x1], None, fx=track.scale, fy=track.scale,
+                                interpolation=cv2.INTER_AREA)
+            th, tw = track.template.shape
+            if window.shape[0] < th or window.shape[1] < tw:
+                continue
+            scores = cv2.matchTemplate(window, track.template, cv2.TM_CCOEFF_NORMED)
+            _, score, _, (dx, dy) = cv2.minMaxLoc(scores)
+            if score < TRACK_MIN_SCORE:
+                continue
+            track.box = (x0 + int(dx / track.scale), y0 + int(dy / track.scale), w, h)
+            alive.append(track)
+        self.tracks = alive
+
+# Mark attendance for the recognised faces and draw them with the stats readout
+def show_results(frame, results, marked, stats):
+    for (x, y, w, h), name in results:
+        color = (0, 255, 0)
+        if name == UNKNOWN_LABEL:
+            color = (0, 0, 255)
+        elif name not in marked:
+            mark_attendance(name)
+            marked.add(name)
+        cv2.rectangle(frame, (x, y), (x + w, y + h), color, 2)
+        cv2.putText(frame, name, (x, y - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.9, color, 2)
+
+    stats.frame_done()
+    cv2.putText(frame, stats.summary(), (10, 25), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
+    cv2.imshow('Face Recognition', frame)
+
+# Producer thread: read frames from the camera into the ring buffer
+def capture_frames(cap, ring, stop, stats):
+    seq = 0
+    while not stop.is_set():
+        start = time.perf_counter()
+        ret, frame = cap.read()
+        if not ret:
+            print("Failed to capture frame.")
+            break
+        stats.record('capture', time.perf_counter() - start)
+        ring.put((seq, frame))
+        seq += 1
+    ring.close()
+
+# Worker: run detection and prediction on frames taken from the ring buffer
+def detection_worker(model, ring, results, stats, threshold):
+    while True:
+        item = ring.get()
+        if item is None:
+            break
+        seq, frame = item
+        results.put((seq, frame, process_frame(model, frame, stats, threshold)))
+    results.put(None)
+
+# Real-time face recognition and attendance.
+# With pipelined=True the camera is read on a background thread and frames are
+# processed by a pool of workers, leaving the UI thread to draw and mark only.
+# With track=True (sequential mode) faces are detected every few frames and
+# tracked in between; the pipelined workers see frames out of order, so they
+# always run full detection.
+def recognize_faces(pipelined=False, workers=2, buffer_size=4, threshold=UNKNOWN_THRESHOLD, track=False):
+    if not FaceModel.exists():
+        print("No trained model found. Train the model first.")
+        return
+    model = FaceModel.load()
 
     cap = cv2.VideoCapture(0)
     print("Recognizing faces. Press 'q' to quit.")
 
     marked = set()
+    stats = PipelineStats()
+
+    if pipelined:
+        ring = FrameRing(buffer_size)
+        results = queue.Queue()
+        stop = threading.Event()
+        producer = threading.Thread(target=capture_frames, args=(cap, ring, stop, stats), daemon=True)
+        producer.start()
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for _ in range(workers):
+                pool.submit(detection_worker, model, ring, results, stats, threshold)
+
+            last_seq = -1
+            finished = 0
+            while finished < workers:
+                try:
+                    item = results.get(timeout=0.05)
+                except queue.Empty:
+                    item = False
+                if item is None:
+                    finished += 1
+                elif item:
+                    seq, frame, faces = item
+                    # Workers can finish out of order; never show an older frame
+                    if seq > last_seq:
+                        last_seq = seq
+                        show_results(frame, faces, marked, stats)
+                if cv2.waitKey(1) & 0xFF == ord('q'):
+                    break
+
+            stop.set()
+            ring.close()
+        producer.join()
+        print(f"Dropped {ring.dropped} frames while workers were busy.")
+    else:
+        tracker = FaceTracker(model, threshold) if track else None
+        while True:
+            start = time.perf_counter()
+            ret, frame = cap.read()
+            if not ret:
+                print("Failed to capture frame.")
+                break
+            stats.record('capture', time.perf_counter() - start)
+
+            if tracker:
+                results = tracker.process(frame, stats)
+            else:
+                results = process_frame(model, frame, stats, threshold)
+            show_results(frame, results, marked, stats)
+            if cv2.waitKey(1) & 0xFF == ord('q'):
+                break
+
+    print(stats.summary())
+    cap.release()
+    cv2.destroyAllWindows()
+
+# Open a video source given as a device index, a video file or a stream URL
+def open_source(source):
+    return cv2.VideoCapture(int(source) if str(source).isdigit() else source)
+
+# One video source in server mode. Processing is rate-limited per stream: after
+# each processed frame the stream waits until it has used no more than its
+# share of the CPU budget (and no more than max_fps), grabbing the frames in
+# between without decoding them. Processed frames go through a FaceTracker, so
+# full detection only runs on some of them. Files are paced at their native frame rate
+# and can loop; cameras and URLs are reopened if they drop out.
+class StreamWorker(threading.Thread):
+    def __init__(self, source, model, ledger, stop, cpu_share, max_fps, threshold=UNKNOWN_THRESHOLD, loop=False):
+        super().__init__(name=f"stream-{source}", daemon=True)
+        self.source = source
+        self.model = model
+        self.ledger = ledger
+        self.stop = stop
+        self.cpu_share = cpu_share
+        self.max_fps = max_fps
+        self.threshold = threshold
+        self.loop = loop
+        self.is_file = os.path.isfile(str(source))
+        self.tracker = FaceTracker(model, threshold)
+        self.stats = PipelineStats()
+        self.frames = 0
+        self.processed = 0
+
+    def run(self):
+        cap = open_source(self.source)
+        if not cap.isOpened():
+            print(f"[{self.source}] Could not open video source.")
+            return
+        frame_interval = 1.0 / (cap.get(cv2.CAP_PROP_FPS) or 25) if self.is_file else 0
+        next_frame = next_detect = time.perf_counter()
+        restarted_at = None
+
+        while not self.stop.is_set():
+            if frame_interval:
+                next_frame += frame_interval
+                time.sleep(max(next_frame - time.perf_counter(), 0))
+
+            now = time.perf_counter()
+            detect = now >= next_detect
+            if detect:
+                ret, frame = cap.read()
+            else:
+                ret = cap.grab()
+
+            if not ret:
+                # Only loop if the last pass produced frames, otherwise an
+                # undecodable file would be re-read in a busy loop forever
+                if self.is_file and self.loop and restarted_at != self.frames:
+                    restarted_at = self.frames
+                    cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                    continue
+                if self.is_file:
+                    print(f"[{self.source}] End of video." if restarted_at != self.frames
+                          else f"[{self.source}] No frames could be decoded, stopping.")
+                    break
+                print(f"[{self.source}] Lost video source, reconnecting.")
+                cap.release()
+                self.stop.wait(2)
+                cap = open_source(self.source)
+                continue
 
+            self.frames += 1
+            self.stats.frame_done()
+            if not detect:
+                continue
+
+            for _, name in self.tracker.process(frame, self.stats):
+                if name != UNKNOWN_LABEL and self.ledger.mark(name):
+                    print(f"[{self.source}] Attendance marked for {name}.")
+            self.processed += 1
+            busy = time.perf_counter() - now
+            next_detect = now + max(busy / self.cpu_share, 1.0 / self.max_fps)
+
+        cap.release()
+
+# Headless attendance server: run every source concurrently with one shared
+# model and ledger, printing per-stream throughput until interrupted.
+# cpu_budget is the number of cores detection may use across all streams.
+def serve(sources, cpu_budget=1.0, max_fps=5.0, threshold=UNKNOWN_THRESHOLD, loop=False, report_interval=10):
+    if not FaceModel.exists():
+        print("No trained model found. Train the model first.")
+        return
+    model = FaceModel.load()
+    ledger = get_ledger()
+    stop = threading.Event()
+
+    share = cpu_budget / len(sources)
+    streams = [StreamWorker(source, model, ledger, stop, share, max_fps, threshold, loop) for source in sources]
+    for stream in streams:
+        stream.start()
+    print(f"Serving {len(streams)} streams. Press Ctrl+C to stop.")
+
+    try:
+        while any(stream.is_alive() for stream in streams):
+            stop.wait(report_interval)
+            for stream in streams:
+                print(f"[{stream.source}] frames {stream.frames}, processed {stream.processed} | {stream.stats.summary()}")
+    except KeyboardInterrupt:
+        print("Stopping...")
+    finally:
+        stop.set()
+        for stream in streams:
+            stream.join()
+        ledger.close()
+
+# Frames for the benchmark: every image of a directory (keyed by file name)
+# or every frame of a video file (keyed by frame number)
+def replay_frames(source):
+    if os.path.isdir(source):
+        for name in sorted(os.listdir(source)):
+            if name.lower().endswith(('.jpg', '.jpeg', '.png', '.bmp')):
+                yield name, cv2.imread(os.path.join(source, name))
+        return
+    cap = cv2.VideoCapture(source)
+    index = 0
     while True:
         ret, frame = cap.read()
         if not ret:
-            print("Failed to capture frame.")
             break
+        yield str(index), frame
+        index += 1
+    cap.release()
 
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        faces = cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_frontalface_default.xml").detectMultiScale(gray, 1.3, 5)
+# Expected names per frame from a CSV manifest with 'frame' and 'name' columns
+def load_manifest(path):
+    expected = {}
+    with open(path, newline='') as f:
+        for row in csv.DictReader(f):
+            expected.setdefault(row['frame'], set()).add(row['name'])
+    return expected
 
-        for (x, y, w, h) in faces:
-            face = cv2.resize(gray[y:y + h, x:x + w], (100, 100)).flatten().reshape(1, -1)
-            name = knn.predict(face)[0]
-            if name not in marked:
-                mark_attendance(name)
-                marked.add(name)
-            cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
-            cv2.putText(frame, name, (x, y - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 255, 0), 2)
-
-        cv2.imshow('Face Recognition', frame)
-        if cv2.waitKey(1) & 0xFF == ord('q'):
-            break
+# Peak resident set size in MB, where the platform reports it
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
 
-    cap.release()
-    cv2.destroyAllWindows()
+# Offline benchmark: replay recorded frames through the detect -> resize ->
+# predict -> mark path and report latency percentiles, throughput, peak memory
+# and, given a manifest, recognition accuracy. Marks go to a throwaway ledger
+# so attendance.csv is not touched.
+def benchmark(source, manifest=None, model_dir=MODEL_DIR, backend=None, threshold=UNKNOWN_THRESHOLD,
+              scale_factor=DETECT_SCALE_FACTOR, min_neighbors=DETECT_MIN_NEIGHBORS, limit=None):
+    model = FaceModel.load(model_dir, backend)
+    expected = load_manifest(manifest) if manifest else {}
+    stages = ('read', 'detect', 'resize', 'predict', 'mark')
+    timings = {stage: [] for stage in stages + ('total',)}
+    true_positives = false_positives = labelled = 0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ledger = AttendanceLedger(os.path.join(tmp, 'attendance.csv'))
+        frames = replay_frames(source)
+        start = time.perf_counter()
+        count = 0
+        while limit is None or count < limit:
+            t0 = time.perf_counter()
+            item = next(frames, None)
+            if item is None:
+                break
+            key, frame = item
+            if frame is None:
+                continue
+            t1 = time.perf_counter()
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            faces = detect_faces(gray, scale_factor, min_neighbors)
+            t2 = time.perf_counter()
+            batch = face_matrix(gray, faces, model.face_size)
+            t3 = time.perf_counter()
+            names = model.predict(batch, threshold)
+            t4 = time.perf_counter()
+            for name in names:
+                if name != UNKNOWN_LABEL:
+                    ledger.mark(name)
+            t5 = time.perf_counter()
+
+            for stage, seconds in zip(stages + ('total',), (t1 - t0, t2 - t1, t3 - t2, t4 - t3, t5 - t4, t5 - t0)):
+                timings[stage].append(seconds)
+            count += 1
+
+            if key in expected:
+                found = set(names) - {UNKNOWN_LABEL}
+                labelled += len(expected[key])
+                true_positives += len(found & expected[key])
+                false_positives += len(found - expected[key])
+        elapsed = time.perf_counter() - start
+        ledger.close()
+
+    if not count:
+        print("No frames could be read from the source.")
+        return
+
+    print(f"Source: {source} | backend {model.index.name} | face size {model.face_size} | "
+          f"scaleFactor {scale_factor} | minNeighbors {min_neighbors} | threshold {threshold}")
+    print(f"{count} frames in {elapsed:.2f}s ({count / elapsed:.1f} frames/sec)")
+    print(f"{'stage':<10}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}")
+    for stage, samples in timings.items():
+        p50, p90, p99 = np.percentile(np.array(samples) * 1000, [50, 90, 99])
+        print(f"{stage:<10}{p50:>10.2f}{p90:>10.2f}{p99:>10.2f}")
+    rss = peak_rss_mb()
+    if rss is not None:
+        print(f"Peak RSS: {rss:.1f} MB")
+    if expected:
+        recall = true_positives / labelled if labelled else 0.0
+        predicted = true_positives + false_positives
+        precision = true_positives / predicted if predicted else 0.0
+        print(f"Accuracy: {recall:.1%} of {labelled} labelled faces recognised, precision {precision:.1%}")
 
 # Main menu
-def main():
+def menu():
     while True:
         print("\nMenu:")
         print("1. Add new student")
         print("2. Train model")
         print("3. Recognize and mark attendance")
-        print("4. Exit")
+        print("4. Recognize and mark attendance (pipelined)")
+        print("5. Rebuild model from scratch")
+        print("6. Exit")
 
         choice = input("Enter your choice: ")
 
@@ -140,11 +1145,62 @@ def main():
         elif choice == '2':
             train_model()
         elif choice == '3':
-            recognize_faces()
+            recognize_faces(track=True)
         elif choice == '4':
+            recognize_faces(pipelined=True)
+        elif choice == '5':
+            train_model(rebuild=True)
+        elif choice == '6':
             break
         else:
             print("Invalid choice. Please try again.")
 
+# Command line entry point; without a command the interactive menu is shown
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Face recognition attendance system")
+    commands = parser.add_subparsers(dest='command')
+
+    train = commands.add_parser('train', help="train or update the face model")
+    train.add_argument('--workers', type=int, default=1, help="processes used to decode images")
+    train.add_argument('--rebuild', action='store_true', help="re-encode the whole dataset and refit PCA")
+    train.add_argument('--backend', choices=sorted(INDEX_BACKENDS), help=f"search index type (default: the saved model's, else {INDEX_BACKEND})")
+    train.add_argument('--components', type=int, help=f"PCA feature dimensions (default: the saved model's, else {PCA_COMPONENTS})")
+    train.add_argument('--face-size', type=int,
+                       help=f"side of the square face crop in pixels (default: the saved model's, else {FACE_SIZE[0]})")
+    train.add_argument('--model-dir', default=MODEL_DIR, help="where to save the model")
+
+    server = commands.add_parser('serve', help="headless attendance from several video sources")
+    server.add_argument('sources', nargs='+', help="camera indices, video files or stream URLs")
+    server.add_argument('--cpu-budget', type=float, default=1.0, help="cores that detection may use in total")
+    server.add_argument('--max-fps', type=float, default=5.0, help="processed frames per second per stream at most")
+    server.add_argument('--threshold', type=float, default=UNKNOWN_THRESHOLD, help="unknown-face distance threshold")
+    server.add_argument('--loop', action='store_true', help="restart video files when they end")
+
+    bench = commands.add_parser('benchmark', help="replay recorded video or images through the pipeline")
+    bench.add_argument('source', help="video file or directory of images")
+    bench.add_argument('--manifest', help="CSV with frame,name columns for accuracy")
+    bench.add_argument('--model-dir', default=MODEL_DIR, help="model to benchmark")
+    bench.add_argument('--backend', choices=sorted(INDEX_BACKENDS), help="search index to use instead of the saved one")
+    bench.add_argument('--threshold', type=float, default=UNKNOWN_THRESHOLD, help="unknown-face distance threshold")
+    bench.add_argument('--scale-factor', type=float, default=DETECT_SCALE_FACTOR, help="detectMultiScale scaleFactor")
+    bench.add_argument('--min-neighbors', type=int, default=DETECT_MIN_NEIGHBORS, help="detectMultiScale minNeighbors")
+    bench.add_argument('--limit', type=int, help="stop after this many frames")
+
+    args = parser.parse_args(argv)
+    if args.command == 'train':
+        train_model(args.components, args.backend, args.rebuild, workers=args.workers,
+                    face_size=(args.face_size, args.face_size) if args.face_size else None, model_dir=args.model_dir)
+    elif args.command == 'serve':
+        if args.cpu_budget <= 0:
+            parser.error("--cpu-budget must be greater than 0")
+        if args.max_fps <= 0:
+            parser.error("--max-fps must be greater than 0")
+        serve(args.sources, args.cpu_budget, args.max_fps, args.threshold, args.loop)
+    elif args.command == 'benchmark':
+        benchmark(args.source, args.manifest, args.model_dir, args.backend, args.threshold,
+                  args.scale_factor, args.min_neighbors, args.limit)
+    else:
+        menu()
+
 if __name__ == "__main__":
     main()
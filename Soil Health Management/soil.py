@@ -1,12 +1,16 @@
 import mysql.connector
+import mysql.connector.pooling
 import tkinter as tk
 from tkinter import ttk, messagebox
-import random
-from faker import Faker
-from datetime import datetime, timedelta
-
-# Initialize Faker for generating random data
-fake = Faker()
+import os
+import csv
+import time
+import queue
+import tempfile
+import threading
+import numpy as np
+from collections import OrderedDict
+from datetime import date
 
 # MySQL Database Connection Details
 DB_CONFIG = {
@@ -16,6 +20,129 @@ DB_CONFIG = {
     "database": "soilmanagement"
 }
 
+# Connections for the GUI actions come from a shared pool. Sessions are not
+# reset when a connection is returned, so statements prepared on it stay valid.
+# They run in autocommit mode, so a read never goes back to the pool with its
+# transaction still open, holding an old snapshot and metadata locks.
+POOL_SIZE = 5
+
+# Bulk load settings. "load_data" streams each chunk through LOAD DATA LOCAL
+# INFILE (needs local_infile enabled on the server); "multirow" sends large
+# multi-row INSERT statements. LOAD DATA falls back to multirow if refused.
+BULK_TOTAL_RECORDS = 2000000
+BULK_CHUNK_SIZE = 50000
+BULK_LOAD_METHOD = "load_data"
+MULTIROW_BATCH = 5000
+
+# Seed for the bulk data generator; set an int to make bulk loads reproducible
+BULK_SEED = None
+
+# Parallel ingest: the job is split across BULK_WORKERS connections, each
+# committing its own chunks. With BULK_DEFER_INDEXES the secondary indexes of
+# the soil table are dropped for the load and rebuilt in one pass afterwards.
+# Their definitions are saved in soil_deferred_indexes until the rebuild, so
+# indexes dropped by a load that never finished are restored by the next one.
+BULK_WORKERS = 4
+BULK_DEFER_INDEXES = False
+DEFERRED_INDEXES_SQL = """CREATE TABLE IF NOT EXISTS soil_deferred_indexes (
+    index_name VARCHAR(64) PRIMARY KEY,
+    is_unique BOOLEAN NOT NULL,
+    columns_sql TEXT NOT NULL)"""
+
+# MySQL errors meaning LOAD DATA LOCAL INFILE is disabled on the client or server
+LOCAL_INFILE_REFUSED = (1148, 2068, 3948)
+
+SOIL_COLUMNS = "soil_type, ph_level, organic_matter_percentage, soil_amendments, planting_date, harvest_date, yield_prediction"
+INSERT_SOIL_SQL = f"INSERT INTO soil ({SOIL_COLUMNS}) VALUES (%s, %s, %s, %s, %s, %s, %s)"
+
+# Record browser: rows are fetched PAGE_SIZE at a time with keyset pagination
+# (WHERE id < last id seen), so every page costs the same however deep the user
+# scrolls. Up to PAGE_CACHE_SIZE pages are kept in an LRU cache and at most
+# MAX_RENDERED_PAGES are held in the Treeview at once.
+PAGE_SIZE = 50
+PAGE_CACHE_SIZE = 20
+MAX_RENDERED_PAGES = 3
+FIRST_PAGE_SQL = "SELECT * FROM soil ORDER BY id DESC LIMIT %s"
+NEXT_PAGE_SQL = "SELECT * FROM soil WHERE id < %s ORDER BY id DESC LIMIT %s"
+
+# Summary tables behind the dashboard. New soil rows are folded into them in id
+# order, SUMMARY_BATCH ids per transaction, starting after the last id already
+# summarised (kept in summary_watermark), so a refresh only reads the rows
+# added since the previous one. Rows edited or deleted afterwards are only
+# picked up by a full rebuild.
+SUMMARY_BATCH = 200000
+PH_BIN_WIDTH = 0.5
+OM_BIN_WIDTH = 1.0
+
+SUMMARY_TABLES_SQL = [
+    """CREATE TABLE IF NOT EXISTS summary_watermark (
+        table_name VARCHAR(64) PRIMARY KEY,
+        last_id BIGINT NOT NULL)""",
+    """CREATE TABLE IF NOT EXISTS soil_yield_summary (
+        soil_type VARCHAR(255) NOT NULL,
+        soil_amendments VARCHAR(255) NOT NULL,
+        month DATE NOT NULL,
+        records BIGINT NOT NULL,
+        yield_sum DOUBLE NOT NULL,
+        PRIMARY KEY (soil_type, soil_amendments, month))""",
+    """CREATE TABLE IF NOT EXISTS soil_ph_summary (
+        soil_type VARCHAR(255) NOT NULL,
+        ph_bin DECIMAL(6, 2) NOT NULL,
+        records BIGINT NOT NULL,
+        PRIMARY KEY (soil_type, ph_bin))""",
+    """CREATE TABLE IF NOT EXISTS soil_om_summary (
+        soil_type VARCHAR(255) NOT NULL,
+        om_bin DECIMAL(6, 2) NOT NULL,
+        records BIGINT NOT NULL,
+        PRIMARY KEY (soil_type, om_bin))""",
+]
+
+# Each statement aggregates the soil rows with last_id < id <= upper and adds
+# the counts to the matching summary rows
+SUMMARY_REFRESH_SQL = [
+    """INSERT INTO soil_yield_summary (soil_type, soil_amendments, month, records, yield_sum)
+       SELECT * FROM (
+           SELECT soil_type, soil_amendments, DATE_SUB(planting_date, INTERVAL DAYOFMONTH(planting_date) - 1 DAY),
+                  COUNT(*), SUM(yield_prediction)
+           FROM soil WHERE id > %s AND id <= %s
+           GROUP BY 1, 2, 3) AS batch
+       ON DUPLICATE KEY UPDATE records = records + VALUES(records), yield_sum = yield_sum + VALUES(yield_sum)""",
+    f"""INSERT INTO soil_ph_summary (soil_type, ph_bin, records)
+       SELECT * FROM (
+           SELECT soil_type, FLOOR(ph_level / {PH_BIN_WIDTH}) * {PH_BIN_WIDTH}, COUNT(*)
+           FROM soil WHERE id > %s AND id <= %s
+           GROUP BY 1, 2) AS batch
+       ON DUPLICATE KEY UPDATE records = records + VALUES(records)""",
+    f"""INSERT INTO soil_om_summary (soil_type, om_bin, records)
+       SELECT * FROM (
+           SELECT soil_type, FLOOR(organic_matter_percentage / {OM_BIN_WIDTH}) * {OM_BIN_WIDTH}, COUNT(*)
+           FROM soil WHERE id > %s AND id <= %s
+           GROUP BY 1, 2) AS batch
+       ON DUPLICATE KEY UPDATE records = records + VALUES(records)""",
+]
+
+# Dashboard views as (tab title, column headings, query). The queries only
+# read the summary tables; {where} is replaced by the soil type filter.
+DASHBOARD_VIEWS = [
+    ("Yield by Soil Type", ("Soil Type", "Records", "Avg Yield (kg)"),
+     "SELECT soil_type, CAST(SUM(records) AS UNSIGNED), ROUND(SUM(yield_sum) / SUM(records), 1) "
+     "FROM soil_yield_summary {where} GROUP BY soil_type ORDER BY soil_type"),
+    ("Yield by Amendment", ("Soil Amendments", "Records", "Avg Yield (kg)"),
+     "SELECT soil_amendments, CAST(SUM(records) AS UNSIGNED), ROUND(SUM(yield_sum) / SUM(records), 1) "
+     "FROM soil_yield_summary {where} GROUP BY soil_amendments ORDER BY soil_amendments"),
+    ("Yield by Month", ("Planting Month", "Records", "Avg Yield (kg)"),
+     "SELECT LEFT(month, 7), CAST(SUM(records) AS UNSIGNED), ROUND(SUM(yield_sum) / SUM(records), 1) "
+     "FROM soil_yield_summary {where} GROUP BY month ORDER BY month"),
+    ("pH Distribution", ("pH Range", "Records", "Share (%)"),
+     f"SELECT CONCAT(ph_bin, ' - ', ph_bin + {PH_BIN_WIDTH}), CAST(SUM(records) AS UNSIGNED), "
+     "ROUND(100 * SUM(records) / SUM(SUM(records)) OVER (), 1) "
+     "FROM soil_ph_summary {where} GROUP BY ph_bin ORDER BY ph_bin"),
+    ("Organic Matter", ("Organic Matter (%)", "Records", "Share (%)"),
+     f"SELECT CONCAT(om_bin, ' - ', om_bin + {OM_BIN_WIDTH}), CAST(SUM(records) AS UNSIGNED), "
+     "ROUND(100 * SUM(records) / SUM(SUM(records)) OVER (), 1) "
+     "FROM soil_om_summary {where} GROUP BY om_bin ORDER BY om_bin"),
+]
+
 # List of sample soil types
 soil_types = ["Loamy", "Sandy", "Clay", "Peaty", "Saline", "Chalky"]
 
@@ -30,90 +157,678 @@ soil_amendments_list = [
     "Green manure"
 ]
 
-# Database Connection Function
-def connect_db():
+_pool = None
+_prepared = {}
+_prepared_lock = threading.Lock()
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        _pool = mysql.connector.pooling.MySQLConnectionPool(
+            pool_name="soil", pool_size=POOL_SIZE, pool_reset_session=False, autocommit=True, **DB_CONFIG)
+    return _pool
+
+# Database Connection Function.
+# Without options a pooled connection is handed out (close() returns it to the
+# pool) after a ping that reconnects it if the server dropped it. Options such
+# as allow_local_infile need a dedicated connection.
+def connect_db(**options):
     try:
-        conn = mysql.connector.connect(**DB_CONFIG)
+        if options:
+            return mysql.connector.connect(**DB_CONFIG, **options)
+        conn = get_pool().get_connection()
+        conn.ping(reconnect=True, attempts=2, delay=0.5)
         return conn
     except mysql.connector.Error as e:
         messagebox.showerror("Database Error", f"Error connecting to database: {e}")
         return None
 
+# Prepared cursor for a statement, reused every time the same pooled
+# connection runs it so the server parses it only once per connection
+def prepared_cursor(conn, sql):
+    key = (conn.connection_id, sql)
+    with _prepared_lock:
+        cursor = _prepared.get(key)
+        if cursor is None:
+            cursor = conn.cursor(prepared=True)
+            _prepared[key] = cursor
+    return cursor
+
 # Function to Insert Manual Soil Record
 def insert_manual_record():
+    soil_type = soil_type_entry.get()
+    ph_level = ph_level_entry.get()
+    organic_matter = organic_matter_entry.get()
+    amendments = soil_amendments_entry.get()
+    planting_date = planting_date_entry.get()
+    harvest_date = harvest_date_entry.get()
+    yield_prediction = yield_entry.get()
+
+    if not soil_type or not ph_level or not organic_matter or not amendments or not planting_date or not harvest_date or not yield_prediction:
+        messagebox.showwarning("Input Error", "All fields must be filled!")
+        return
+
     conn = connect_db()
     if conn:
-        cursor = conn.cursor()
-        soil_type = soil_type_entry.get()
-        ph_level = ph_level_entry.get()
-        organic_matter = organic_matter_entry.get()
-        amendments = soil_amendments_entry.get()
-        planting_date = planting_date_entry.get()
-        harvest_date = harvest_date_entry.get()
-        yield_prediction = yield_entry.get()
-
-        if not soil_type or not ph_level or not organic_matter or not amendments or not planting_date or not harvest_date or not yield_prediction:
-            messagebox.showwarning("Input Error", "All fields must be filled!")
-            return
-
         try:
-            cursor.execute("""
-                INSERT INTO soil (soil_type, ph_level, organic_matter_percentage, soil_amendments, planting_date, harvest_date, yield_prediction)
-                VALUES (%s, %s, %s, %s, %s, %s, %s)
-            """, (soil_type, ph_level, organic_matter, amendments, planting_date, harvest_date, yield_prediction))
+            prepared_cursor(conn, INSERT_SOIL_SQL).execute(
+                INSERT_SOIL_SQL, (soil_type, ph_level, organic_matter, amendments, planting_date, harvest_date, yield_prediction))
             conn.commit()
-            messagebox.showinfo("Success", "Soil record inserted successfully!")
-            conn.close()
-            display_records()
         except mysql.connector.Error as e:
             messagebox.showerror("Database Error", f"Error inserting record: {e}")
+            return
+        finally:
+            conn.close()
+        messagebox.showinfo("Success", "Soil record inserted successfully!")
+        display_records()
+        # A bulk job refreshes the summaries itself once all its chunks are committed
+        if not bulk_active.is_set():
+            start_summary_refresh()
+
+# Function to Generate Random Data for Bulk Insert.
+# A whole batch is drawn at once as NumPy columns: category codes, uniform
+# floats, day offsets and yields, in SOIL_COLUMNS order.
+def generate_batch(rng, size):
+    today = np.datetime64(date.today(), "D")
+    planting_date = today - rng.integers(0, 731, size)  # Planting in last 2 years
+    return (
+        np.asarray(soil_types, dtype=object)[rng.integers(0, len(soil_types), size)],
+        np.round(rng.uniform(5.0, 8.0, size), 2),  # Soil pH between 5.0 and 8.0
+        np.round(rng.uniform(2.0, 10.0, size), 2),  # Organic matter percentage between 2% and 10%
+        np.asarray(soil_amendments_list, dtype=object)[rng.integers(0, len(soil_amendments_list), size)],
+        planting_date,
+        planting_date + rng.integers(60, 181, size),  # Harvest after 2-6 months
+        rng.integers(500, 5001, size),  # Yield in kg
+    )
+
+# Format a date column as 'YYYY-MM-DD' strings. The dates span only a few
+# hundred days, so each distinct day is formatted once and looked up.
+def date_strings(column):
+    first = column.min()
+    offsets = (column - first).astype(np.int64)
+    days = (first + np.arange(offsets.max() + 1)).astype(str).astype(object)
+    return days[offsets].tolist()
+
+# Turn a batch of columns into row tuples for the database driver
+def batch_rows(columns):
+    return list(zip(*(date_strings(column) if column.dtype.kind == "M" else column.tolist()
+                      for column in columns)))
+
+# Stream generated rows chunk by chunk instead of materialising the whole job
+def generate_chunks(total, chunk_size, seed=BULK_SEED):
+    rng = np.random.default_rng(seed)
+    for start in range(0, total, chunk_size):
+        yield batch_rows(generate_batch(rng, min(chunk_size, total - start)))
+
+# Load one chunk with LOAD DATA LOCAL INFILE. mysql.connector sends the file by
+# path, so the chunk is written as CSV to a temporary file first.
+def load_chunk_infile(cursor, rows):
+    fd, path = tempfile.mkstemp(suffix=".csv")
+    try:
+        with os.fdopen(fd, "w", newline="") as f:
+            csv.writer(f, lineterminator="\n").writerows(rows)
+        cursor.execute(f"""
+            LOAD DATA LOCAL INFILE %s INTO TABLE soil
+            FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '"' LINES TERMINATED BY '\\n'
+            ({SOIL_COLUMNS})
+        """, (path.replace("\\", "/"),))
+    finally:
+        os.remove(path)
+
+# Load one chunk as a few large multi-row INSERT statements
+def insert_chunk_multirow(cursor, rows):
+    for start in range(0, len(rows), MULTIROW_BATCH):
+        batch = rows[start:start + MULTIROW_BATCH]
+        values = ", ".join(["(%s, %s, %s, %s, %s, %s, %s)"] * len(batch))
+        cursor.execute(f"INSERT INTO soil ({SOIL_COLUMNS}) VALUES {values}", [value for row in batch for value in row])
+
+# Generate and load total random records, committing after every chunk.
+# progress(inserted, total, rows_per_sec) is called after each commit, and the
+# load stops before the next chunk once the cancel event is set.
+def bulk_load(conn, total=BULK_TOTAL_RECORDS, chunk_size=BULK_CHUNK_SIZE, method=BULK_LOAD_METHOD, progress=None,
+              cancel=None, seed=BULK_SEED):
+    cursor = conn.cursor()
+    start = time.perf_counter()
+    inserted = 0
+    try:
+        for rows in generate_chunks(total, chunk_size, seed):
+            if cancel is not None and cancel.is_set():
+                break
+            if method == "load_data":
+                try:
+                    load_chunk_infile(cursor, rows)
+                except mysql.connector.Error as e:
+                    if e.errno not in LOCAL_INFILE_REFUSED:
+                        raise
+                    method = "multirow"
+            if method == "multirow":
+                insert_chunk_multirow(cursor, rows)
+            conn.commit()
+            inserted += len(rows)
+            if progress:
+                progress(inserted, total, inserted / (time.perf_counter() - start))
+    finally:
+        cursor.close()
+    return inserted, time.perf_counter() - start
+
+# Secondary B-tree indexes of the soil table as {name: (unique, column definitions)}
+def secondary_indexes(cursor):
+    cursor.execute("""
+        SELECT INDEX_NAME, NON_UNIQUE, COLUMN_NAME, SUB_PART FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'soil' AND INDEX_NAME <> 'PRIMARY' AND INDEX_TYPE = 'BTREE'
+        ORDER BY INDEX_NAME, SEQ_IN_INDEX
+    """)
+    indexes = {}
+    for name, non_unique, column, sub_part in cursor.fetchall():
+        definition = f"`{column}`({sub_part})" if sub_part else f"`{column}`"
+        indexes.setdefault(name, (not int(non_unique), []))[1].append(definition)
+    return indexes
+
+# Indexes saved by a bulk load that was stopped before rebuilding them and that
+# are still missing from the soil table
+def unrestored_indexes(cursor):
+    cursor.execute(DEFERRED_INDEXES_SQL)
+    cursor.execute("SELECT index_name, is_unique, columns_sql FROM soil_deferred_indexes")
+    saved = {name: (bool(unique), [columns]) for name, unique, columns in cursor.fetchall()}
+    existing = secondary_indexes(cursor)
+    return {name: definition for name, definition in saved.items() if name not in existing}
+
+def drop_indexes(cursor, indexes):
+    if indexes:
+        cursor.execute(DEFERRED_INDEXES_SQL)
+        cursor.executemany("REPLACE INTO soil_deferred_indexes (index_name, is_unique, columns_sql) VALUES (%s, %s, %s)",
+                           [(name, unique, ", ".join(columns)) for name, (unique, columns) in indexes.items()])
+        # ALTER TABLE commits implicitly, so the definitions are saved first
+        cursor.execute("ALTER TABLE soil " + ", ".join(f"DROP INDEX `{name}`" for name in indexes))
+
+def rebuild_indexes(cursor, indexes):
+    if indexes:
+        cursor.execute("ALTER TABLE soil " + ", ".join(
+            f"ADD {'UNIQUE ' if unique else ''}INDEX `{name}` ({', '.join(columns)})"
+            for name, (unique, columns) in indexes.items()))
+    cursor.execute("DELETE FROM soil_deferred_indexes")
+
+# Split the bulk job across several connections, each loading its share with
+# its own generator stream and its own per-chunk transactions. conn is used to
+# manage the indexes. progress() receives the aggregate over all workers and
+# status() reports phases such as the index rebuild.
+def parallel_bulk_load(conn, total=BULK_TOTAL_RECORDS, workers=BULK_WORKERS, defer_indexes=BULK_DEFER_INDEXES,
+                       chunk_size=BULK_CHUNK_SIZE, method=BULK_LOAD_METHOD, progress=None, status=None, cancel=None):
+    cancel = cancel or threading.Event()
+    shares = [total // workers + (1 if i < total % workers else 0) for i in range(workers)]
+    seeds = np.random.SeedSequence(BULK_SEED).spawn(workers)
+    lock = threading.Lock()
+    inserted = [0]
+    errors = []
+    start = time.perf_counter()
+
+    def load_share(share, seed):
+        done = [0]
+
+        def report(worker_inserted, worker_total, rate):
+            with lock:
+                inserted[0] += worker_inserted - done[0]
+                done[0] = worker_inserted
+                total_inserted = inserted[0]
+            if progress:
+                progress(total_inserted, total, total_inserted / (time.perf_counter() - start))
 
-# Function to Generate Random Data for Bulk Insert
-def generate_data():
-    soil_type = random.choice(soil_types)
-    ph_level = round(random.uniform(5.0, 8.0), 2)  # Soil pH between 5.0 and 8.0
-    organic_matter = round(random.uniform(2.0, 10.0), 2)  # Organic matter percentage between 2% and 10%
-    amendments = random.choice(soil_amendments_list)
-    planting_date = fake.date_between(start_date="-2y", end_date="today")  # Planting in last 2 years
-    harvest_date = planting_date + timedelta(days=random.randint(60, 180))  # Harvest after 2-6 months
-    yield_prediction = random.randint(500, 5000)  # Yield in kg
-    return (soil_type, ph_level, organic_matter, amendments, planting_date, harvest_date, yield_prediction)
-
-# Function to Insert 100,000 Random Records
-def insert_bulk_records():
-    conn = connect_db()
-    if conn:
-        cursor = conn.cursor()
-        batch_size = 100000
-        total_records = 2000000
-
-        for i in range(0, total_records, batch_size):
-            data_batch = [generate_data() for _ in range(batch_size)]
-            cursor.executemany("""
-                INSERT INTO soil (soil_type, ph_level, organic_matter_percentage, soil_amendments, planting_date, harvest_date, yield_prediction)
-                VALUES (%s, %s, %s, %s, %s, %s, %s)
-            """, data_batch)
+        try:
+            worker_conn = mysql.connector.connect(**DB_CONFIG, allow_local_infile=True)
+        except mysql.connector.Error as e:
+            errors.append(e)
+            cancel.set()
+            return
+        try:
+            if defer_indexes:
+                cursor = worker_conn.cursor()
+                cursor.execute("SET SESSION unique_checks = 0, foreign_key_checks = 0")
+                cursor.close()
+            bulk_load(worker_conn, share, chunk_size, method, report, cancel, seed)
+        except Exception as e:
+            # Any failure, not only a database error, must stop the other
+            # workers and reach the caller instead of ending this thread silently
+            errors.append(e)
+            cancel.set()
+        finally:
+            worker_conn.close()
+
+    cursor = conn.cursor()
+    indexes = {}
+    try:
+        # Without deferral, indexes left dropped by an earlier load are put back
+        # now; with it, they are rebuilt along with the others after this load
+        leftover = unrestored_indexes(cursor)
+        if leftover and not defer_indexes:
+            if status:
+                status(f"Restoring {len(leftover)} indexes dropped by an unfinished load...")
+            rebuild_indexes(cursor, leftover)
+            conn.commit()
+        if defer_indexes:
+            indexes.update(leftover)
+            dropped = secondary_indexes(cursor)
+            if dropped:
+                if status:
+                    status(f"Dropping {len(dropped)} secondary indexes...")
+                drop_indexes(cursor, dropped)
+            indexes.update(dropped)
+
+        threads = [threading.Thread(target=load_share, args=(share, seed), daemon=True)
+                   for share, seed in zip(shares, seeds) if share]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        if indexes:
+            if status:
+                status(f"Rebuilding {len(indexes)} secondary indexes...")
+            rebuild_indexes(cursor, indexes)
             conn.commit()
-            progress_label.config(text=f"{i + batch_size} records inserted...")
+        cursor.close()
 
-        messagebox.showinfo("Success", "100,000 records inserted successfully!")
+    if errors:
+        raise errors[0]
+    return inserted[0], time.perf_counter() - start
+
+# The bulk job runs on a worker thread; it reports back through this queue,
+# which the Tk main loop polls, because Tk widgets may only be touched from
+# the main thread
+bulk_updates = queue.Queue()
+bulk_cancel = threading.Event()
+bulk_active = threading.Event()
+
+def run_bulk_job(conn, workers, defer_indexes):
+    try:
+        inserted, elapsed = parallel_bulk_load(
+            conn, workers=workers, defer_indexes=defer_indexes,
+            progress=lambda *update: bulk_updates.put(("progress",) + update),
+            status=lambda text: bulk_updates.put(("status", text)),
+            cancel=bulk_cancel)
+        bulk_updates.put(("status", "Refreshing summaries..."))
+        refresh_summaries(conn)
+        bulk_updates.put(("done", inserted, elapsed, workers))
+    except Exception as e:
+        bulk_updates.put(("error", e))
+    finally:
         conn.close()
+
+def poll_bulk_job():
+    while True:
+        try:
+            update = bulk_updates.get_nowait()
+        except queue.Empty:
+            break
+
+        if update[0] == "progress":
+            _, inserted, total, rate = update
+            eta = (total - inserted) / rate if rate else 0
+            progress_label.config(text=f"{inserted:,} / {total:,} records | {rate:,.0f} rows/sec | ETA {eta:,.0f}s")
+            continue
+        if update[0] == "status":
+            progress_label.config(text=update[1])
+            continue
+
+        bulk_active.clear()
+        bulk_insert_button.config(state="normal")
+        cancel_button.config(state="disabled")
+        if update[0] == "done":
+            _, inserted, elapsed, workers = update
+            progress_label.config(text=f"{inserted:,} records inserted in {elapsed:.1f}s")
+            if bulk_cancel.is_set():
+                messagebox.showinfo("Cancelled", f"Bulk insert cancelled after {inserted:,} records.")
+            else:
+                messagebox.showinfo("Success", f"{inserted:,} records inserted in {elapsed:.1f}s over {workers} connections "
+                                               f"({inserted / elapsed:,.0f} rows/sec)")
+        else:
+            progress_label.config(text="Bulk insert failed")
+            messagebox.showerror("Database Error", f"Error inserting records: {update[1]}")
         display_records()
+        if dashboard is not None:
+            dashboard.load()
+        return
+    root.after(200, poll_bulk_job)
 
-# Function to Display Records
-def display_records():
-    conn = connect_db()
+# Function to Insert Random Records in Bulk
+def insert_bulk_records():
+    try:
+        workers = max(1, int(workers_spinbox.get()))
+    except ValueError:
+        messagebox.showwarning("Input Error", "Connections must be a whole number!")
+        return
+    conn = connect_db(allow_local_infile=True)
     if conn:
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM soil ORDER BY id DESC LIMIT 20")  # Show last 20 records
-        rows = cursor.fetchall()
+        bulk_cancel.clear()
+        bulk_active.set()
+        bulk_insert_button.config(state="disabled")
+        cancel_button.config(state="normal")
+        progress_label.config(text="Starting bulk insert...")
+        threading.Thread(target=run_bulk_job, args=(conn, workers, defer_indexes_var.get()), daemon=True).start()
+        root.after(200, poll_bulk_job)
+
+# Stop the bulk job once the chunk in progress has been committed
+def cancel_bulk_records():
+    bulk_cancel.set()
+    cancel_button.config(state="disabled")
+    progress_label.config(text="Cancelling after the current batch...")
+
+# Fetch the page of records that follows the given id (None for the newest).
+# Safe to call from a background thread: errors are raised, not shown.
+def fetch_page(anchor):
+    conn = get_pool().get_connection()
+    try:
+        conn.ping(reconnect=True, attempts=2, delay=0.5)
+        sql = FIRST_PAGE_SQL if anchor is None else NEXT_PAGE_SQL
+        cursor = prepared_cursor(conn, sql)
+        cursor.execute(sql, (PAGE_SIZE,) if anchor is None else (anchor, PAGE_SIZE))
+        return cursor.fetchall()
+    finally:
         conn.close()
 
-        for row in tree.get_children():
-            tree.delete(row)
+# Virtualized view of the soil table in the Treeview. Pages are loaded as the
+# user scrolls towards either end, pages scrolled far out of view are removed
+# from the widget, and the page after the last one shown is prefetched on a
+# background thread.
+class RecordBrowser:
+    def __init__(self, tree, scrollbar):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+        self.pending = set()
+        self.generation = 0
+        self.check_scheduled = False
+        tree.configure(yscrollcommand=self.on_scroll)
+
+    # Start again from the newest records, dropping everything cached
+    def reset(self):
+        with self.lock:
+            self.cache.clear()
+            self.generation += 1
+        # anchors[k] is the id page k starts below; it is known once page k-1 is loaded
+        self.anchors = [None]
+        self.pages = {}
+        self.first = 0
+        self.last = -1
+        self.tree.delete(*self.tree.get_children())
+        self.show_next()
+
+    def cached(self, anchor):
+        with self.lock:
+            rows = self.cache.get(anchor)
+            if rows is not None:
+                self.cache.move_to_end(anchor)
+            return rows
+
+    def store(self, anchor, rows, generation):
+        with self.lock:
+            if generation != self.generation:
+                return
+            self.cache[anchor] = rows
+            self.cache.move_to_end(anchor)
+            while len(self.cache) > PAGE_CACHE_SIZE:
+                self.cache.popitem(last=False)
+
+    def get_page(self, page):
+        anchor = self.anchors[page]
+        rows = self.cached(anchor)
+        if rows is None:
+            rows = fetch_page(anchor)
+            self.store(anchor, rows, self.generation)
+        if len(rows) == PAGE_SIZE and len(self.anchors) == page + 1:
+            self.anchors.append(rows[-1][0])
+        return rows
+
+    def prefetch(self, page):
+        if page >= len(self.anchors):
+            return
+        anchor = self.anchors[page]
+        with self.lock:
+            if anchor in self.cache or anchor in self.pending:
+                return
+            self.pending.add(anchor)
+            generation = self.generation
+        threading.Thread(target=self._prefetch, args=(anchor, generation), daemon=True).start()
+
+    def _prefetch(self, anchor, generation):
+        try:
+            self.store(anchor, fetch_page(anchor), generation)
+        except mysql.connector.Error:
+            pass  # The page is simply fetched again when it is needed
+        finally:
+            with self.lock:
+                self.pending.discard(anchor)
+
+    # Append the page after the last one shown, dropping the top page if too many are rendered
+    def show_next(self):
+        page = self.last + 1
+        if page >= len(self.anchors):
+            return
+        rows = self.get_page(page)
+        if not rows:
+            return
+        self.pages[page] = [self.tree.insert("", "end", values=row) for row in rows]
+        self.last = page
+        if self.last - self.first + 1 > MAX_RENDERED_PAGES:
+            self.tree.delete(*self.pages.pop(self.first))
+            self.first += 1
+            self.tree.see(self.pages[page][0])
+        self.prefetch(page + 1)
+
+    # Prepend the page before the first one shown, dropping the bottom page if too many are rendered
+    def show_previous(self):
+        if self.first == 0:
+            return
+        page = self.first - 1
+        rows = self.get_page(page)
+        previous_top = self.tree.get_children()[0]
+        self.pages[page] = [self.tree.insert("", index, values=row) for index, row in enumerate(rows)]
+        self.first = page
+        if self.last - self.first + 1 > MAX_RENDERED_PAGES:
+            self.tree.delete(*self.pages.pop(self.last))
+            self.last -= 1
+        self.tree.see(previous_top)
+
+    def on_scroll(self, top, bottom):
+        self.scrollbar.set(top, bottom)
+        # Loading pages changes the scroll position again, so act once the
+        # widget has settled rather than from inside this callback
+        if not self.check_scheduled:
+            self.check_scheduled = True
+            self.tree.after_idle(self.check_scroll)
+
+    def check_scroll(self):
+        self.check_scheduled = False
+        top, bottom = self.tree.yview()
+        try:
+            if bottom >= 0.95:
+                self.show_next()
+            elif top <= 0.05:
+                self.show_previous()
+        except mysql.connector.Error as e:
+            messagebox.showerror("Database Error", f"Error loading records: {e}")
+
+# Function to Display Records
+def display_records():
+    try:
+        browser.reset()
+    except mysql.connector.Error as e:
+        messagebox.showerror("Database Error", f"Error loading records: {e}")
+
+# Create the summary tables and their watermark row if they do not exist yet
+def create_summary_tables(cursor):
+    for sql in SUMMARY_TABLES_SQL:
+        cursor.execute(sql)
+    cursor.execute("INSERT IGNORE INTO summary_watermark (table_name, last_id) VALUES ('soil', 0)")
+
+# Fold the soil rows added since the last refresh into the summary tables, one
+# id range per transaction. The watermark row is locked for each batch, so
+# concurrent refreshes take turns instead of counting rows twice. With rebuild
+# the summaries are emptied and recomputed from the whole table.
+def refresh_summaries(conn, rebuild=False):
+    cursor = conn.cursor()
+    try:
+        create_summary_tables(cursor)
+        conn.commit()
+        # Pooled connections are in autocommit mode, so each step that has to
+        # be atomic opens its own transaction
+        conn.start_transaction()
+        if rebuild:
+            cursor.execute("SELECT last_id FROM summary_watermark WHERE table_name = 'soil' FOR UPDATE")
+            cursor.fetchall()
+            for table in ("soil_yield_summary", "soil_ph_summary", "soil_om_summary"):
+                cursor.execute(f"DELETE FROM {table}")
+            cursor.execute("UPDATE summary_watermark SET last_id = 0 WHERE table_name = 'soil'")
+        cursor.execute("SELECT COALESCE(MAX(id), 0) FROM soil")
+        max_id = cursor.fetchone()[0]
+        conn.commit()
+
+        while True:
+            conn.start_transaction()
+            cursor.execute("SELECT last_id FROM summary_watermark WHERE table_name = 'soil' FOR UPDATE")
+            last_id = cursor.fetchone()[0]
+            if last_id >= max_id:
+                conn.commit()
+                return max_id
+            upper = min(last_id + SUMMARY_BATCH, max_id)
+            for sql in SUMMARY_REFRESH_SQL:
+                cursor.execute(sql, (last_id, upper))
+            cursor.execute("UPDATE summary_watermark SET last_id = %s WHERE table_name = 'soil'", (upper,))
+            conn.commit()
+    except mysql.connector.Error:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+# Summary refreshes started from the GUI run on a worker thread and report
+# back through this queue, like the bulk job
+summary_updates = queue.Queue()
+
+def run_summary_refresh(rebuild):
+    conn = None
+    try:
+        conn = get_pool().get_connection()
+        conn.ping(reconnect=True, attempts=2, delay=0.5)
+        summary_updates.put(("done", refresh_summaries(conn, rebuild)))
+    except mysql.connector.Error as e:
+        summary_updates.put(("error", e))
+    finally:
+        if conn:
+            conn.close()
 
-        for row in rows:
-            tree.insert("", "end", values=row)
+def poll_summary_refresh():
+    try:
+        update = summary_updates.get_nowait()
+    except queue.Empty:
+        root.after(200, poll_summary_refresh)
+        return
+    if update[0] == "error":
+        messagebox.showerror("Database Error", f"Error refreshing summaries: {update[1]}")
+    if dashboard is not None:
+        dashboard.refreshed(update)
+
+def start_summary_refresh(rebuild=False):
+    threading.Thread(target=run_summary_refresh, args=(rebuild,), daemon=True).start()
+    root.after(200, poll_summary_refresh)
+
+# Dashboard window showing average yield, pH distribution and organic matter
+# bins. Every view is a GROUP BY over the small summary tables, never over the
+# soil table itself.
+class SummaryDashboard:
+    def __init__(self):
+        self.window = tk.Toplevel(root)
+        self.window.title("Soil Summary Dashboard")
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+
+        controls = tk.Frame(self.window)
+        controls.pack(fill="x", padx=10, pady=5)
+        tk.Label(controls, text="Soil Type", font=font_label).pack(side="left")
+        self.soil_type = ttk.Combobox(controls, values=["All"] + soil_types, state="readonly", width=12)
+        self.soil_type.set("All")
+        self.soil_type.bind("<<ComboboxSelected>>", lambda event: self.load())
+        self.soil_type.pack(side="left", padx=5)
+        self.refresh_button = tk.Button(controls, text="Refresh", command=lambda: self.refresh(False))
+        self.refresh_button.pack(side="left", padx=5)
+        self.rebuild_button = tk.Button(controls, text="Rebuild", command=lambda: self.refresh(True))
+        self.rebuild_button.pack(side="left")
+        self.status = tk.Label(controls, text="", font=font_progress)
+        self.status.pack(side="left", padx=10)
+
+        notebook = ttk.Notebook(self.window)
+        notebook.pack(fill="both", expand=True, padx=10, pady=5)
+        self.views = []
+        for title, headings, sql in DASHBOARD_VIEWS:
+            view = ttk.Treeview(notebook, columns=headings, show="headings", height=15)
+            for heading in headings:
+                view.heading(heading, text=heading)
+                view.column(heading, width=160, anchor="center")
+            notebook.add(view, text=title)
+            self.views.append((view, sql))
+        self.refresh(False)
+
+    def close(self):
+        global dashboard
+        dashboard = None
+        self.window.destroy()
+
+    # Bring the summaries up to date in the background, then reload the views.
+    # Not during a bulk load: its workers commit chunks out of id order, and
+    # moving the watermark past ids still uncommitted would skip those rows
+    # for good. The bulk job refreshes the summaries itself once it is done.
+    def refresh(self, rebuild):
+        if bulk_active.is_set():
+            self.load()
+            self.status.config(text="Bulk insert running, summaries will refresh when it finishes")
+            return
+        self.refresh_button.config(state="disabled")
+        self.rebuild_button.config(state="disabled")
+        self.status.config(text="Rebuilding summaries..." if rebuild else "Refreshing summaries...")
+        start_summary_refresh(rebuild)
+
+    def refreshed(self, update):
+        self.refresh_button.config(state="normal")
+        self.rebuild_button.config(state="normal")
+        self.load(update[1] if update[0] == "done" else None)
+
+    def load(self, summarised=None):
+        soil_type = self.soil_type.get()
+        where, params = ("", ()) if soil_type == "All" else ("WHERE soil_type = %s", (soil_type,))
+        conn = connect_db()
+        if not conn:
+            return
+        start = time.perf_counter()
+        try:
+            results = []
+            for view, sql in self.views:
+                cursor = prepared_cursor(conn, sql.format(where=where))
+                cursor.execute(sql.format(where=where), params)
+                results.append(cursor.fetchall())
+        except mysql.connector.Error as e:
+            messagebox.showerror("Database Error", f"Error loading summaries: {e}")
+            return
+        finally:
+            conn.close()
+        elapsed = time.perf_counter() - start
+
+        for (view, sql), rows in zip(self.views, results):
+            view.delete(*view.get_children())
+            for row in rows:
+                view.insert("", "end", values=row)
+        text = f"Loaded in {elapsed * 1000:.0f} ms"
+        if summarised is not None:
+            text = f"Summarised up to id {summarised:,} | {text}"
+        self.status.config(text=text)
+
+dashboard = None
+
+# Function to Open the Summary Dashboard
+def open_dashboard():
+    global dashboard
+    if dashboard is None:
+        dashboard = SummaryDashboard()
+    else:
+        dashboard.window.lift()
 
 # GUI Setup
 root = tk.Tk()
@@ -162,11 +877,32 @@ yield_entry = tk.Entry(root, font=font_entry)
 yield_entry.grid(row=7, column=1, padx=10, pady=5)
 
 # Buttons with Styling
-insert_button = tk.Button(root, text="Insert Record", font=font_button, bg="#4CAF50", fg="white", command=insert_manual_record)
-insert_button.grid(row=8, column=0, columnspan=2, pady=10)
+actions_frame = tk.Frame(root, bg="#f0f0f0")
+actions_frame.grid(row=8, column=0, columnspan=2, pady=10)
+
+insert_button = tk.Button(actions_frame, text="Insert Record", font=font_button, bg="#4CAF50", fg="white", command=insert_manual_record)
+insert_button.pack(side="left", padx=5)
+
+dashboard_button = tk.Button(actions_frame, text="Dashboard", font=font_button, bg="#FF9800", fg="white", command=open_dashboard)
+dashboard_button.pack(side="left", padx=5)
+
+bulk_frame = tk.Frame(root, bg="#f0f0f0")
+bulk_frame.grid(row=9, column=0, columnspan=2, pady=10)
 
-bulk_insert_button = tk.Button(root, text="Insert 100,000 Random Records", font=font_button, bg="#008CBA", fg="white", command=insert_bulk_records)
-bulk_insert_button.grid(row=9, column=0, columnspan=2, pady=10)
+bulk_insert_button = tk.Button(bulk_frame, text=f"Insert {BULK_TOTAL_RECORDS:,} Random Records", font=font_button, bg="#008CBA", fg="white", command=insert_bulk_records)
+bulk_insert_button.pack(side="left", padx=5)
+
+cancel_button = tk.Button(bulk_frame, text="Cancel", font=font_button, bg="#f44336", fg="white", state="disabled", command=cancel_bulk_records)
+cancel_button.pack(side="left", padx=5)
+
+tk.Label(bulk_frame, text="Connections", font=font_label, bg="#f0f0f0").pack(side="left", padx=(15, 5))
+workers_spinbox = tk.Spinbox(bulk_frame, from_=1, to=32, width=4, font=font_entry)
+workers_spinbox.delete(0, "end")
+workers_spinbox.insert(0, BULK_WORKERS)
+workers_spinbox.pack(side="left")
+
+defer_indexes_var = tk.BooleanVar(value=BULK_DEFER_INDEXES)
+tk.Checkbutton(bulk_frame, text="Defer index maintenance", variable=defer_indexes_var, font=font_label, bg="#f0f0f0").pack(side="left", padx=5)
 
 progress_label = tk.Label(root, text="", font=font_progress, bg="#f0f0f0")
 progress_label.grid(row=10, column=0, columnspan=2)
@@ -174,7 +910,11 @@ progress_label.grid(row=10, column=0, columnspan=2)
 # Table to Display Records with Enhanced Style
 columns = ("ID", "Soil Type", "pH Level", "Organic Matter (%)", "Soil Amendments", "Planting Date", "Harvest Date", "Yield Prediction")
 tree = ttk.Treeview(root, columns=columns, show="headings", height=10)
-tree.grid(row=11, column=0, columnspan=2, padx=10, pady=10)
+tree.grid(row=11, column=0, columnspan=2, padx=(10, 0), pady=10)
+
+scrollbar = ttk.Scrollbar(root, orient="vertical", command=tree.yview)
+scrollbar.grid(row=11, column=2, sticky="ns", pady=10)
+browser = RecordBrowser(tree, scrollbar)
 
 # Style for Treeview
 tree.heading("ID", text="ID")
@@ -1,7 +1,202 @@
+import re
+import sys
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
 import streamlit as st
 import mysql.connector
 import pandas as pd
 
+# Query results are streamed: the first FETCH_CHUNK_SIZE rows are shown straight
+# away and further rows are fetched from the still open cursor on demand, until
+# the result is exhausted or the fetched rows take up MAX_RESULT_MB of memory
+FETCH_CHUNK_SIZE = 500
+MAX_RESULT_MB = 256
+
+# Results of read-only statements are cached per session for QUERY_CACHE_TTL
+# seconds, keyed by server, database and normalized SQL. At most
+# QUERY_CACHE_SIZE results taking up QUERY_CACHE_MB of memory in total are
+# kept, the least recently used evicted first; larger results are not cached.
+QUERY_CACHE_TTL = 300
+QUERY_CACHE_SIZE = 50
+QUERY_CACHE_MB = 64
+
+CACHEABLE_RE = re.compile(r"^\s*(select|show|describe|desc|explain)\b", re.I)
+# Writes, locking reads, volatile functions, user variables and live server
+# state (process list, status counters, the system schemas) are never cached
+UNCACHEABLE_RE = re.compile(
+    r"@|\b(into|for\s+update|lock\s+in\s+share\s+mode|rand|now|uuid|uuid_short|sysdate|curdate|curtime|"
+    r"current_(?:date|time|timestamp)|utc_(?:date|time|timestamp)|localtime|localtimestamp|unix_timestamp|"
+    r"connection_id|last_insert_id|found_rows|row_count|information_schema|performance_schema)\b|"
+    r"\bsys\s*\.|^\s*show\s+(?:full\s+)?processlist\b|^\s*show\s+(?:\w+\s+)?status\b|^\s*show\s+engine\b",
+    re.I)
+# A quoted string or identifier (kept as written) or a run of whitespace
+QUOTED_OR_SPACE_RE = re.compile(r"""('(?:[^'\\]|\\.|'')*'|"(?:[^"\\]|\\.|"")*"|`(?:[^`]|``)*`)|\s+""", re.S)
+USE_RE = re.compile(r"^\s*use\s+`?(\w+)`?\s*;?\s*$", re.I)
+DDL_RE = re.compile(r"^\s*(create|drop|alter|rename|truncate)\b", re.I)
+DATABASE_DDL_RE = re.compile(r"^\s*(create|drop|alter)\s+(database|schema)\b", re.I)
+WRITE_TABLES_RE = re.compile(
+    r"^\s*(?:insert(?:\s+ignore)?(?:\s+into)?|replace(?:\s+into)?|update(?:\s+ignore)?|delete\s+from|"
+    r"truncate(?:\s+table)?|alter\s+table|drop\s+table(?:\s+if\s+exists)?|"
+    r"create\s+table(?:\s+if\s+not\s+exists)?|rename\s+table)\s+([`\w.]+(?:\s*,\s*[`\w.]+)*)", re.I)
+
+# Connections come from process-wide pools shared by every session, one pool
+# per server, user, database and password. A pool holds at most POOL_MAX_SIZE
+# connections, pings a connection idle for more than POOL_PING_AFTER seconds
+# before handing it out, and closes connections idle for POOL_IDLE_TIMEOUT.
+# Each session keeps one connection checked out while it works on a database,
+# so session variables, SET statements and temporary tables last from one
+# Execute to the next. A connection unused for POOL_LEASE_TIMEOUT (the session
+# was abandoned) is closed and its slot given back.
+POOL_MAX_SIZE = 20
+POOL_ACQUIRE_TIMEOUT = 10
+POOL_PING_AFTER = 30
+POOL_IDLE_TIMEOUT = 300
+POOL_LEASE_TIMEOUT = 1800
+POOL_REAP_INTERVAL = 60
+
+# With profiling on, every statement's execute, fetch and DataFrame build times
+# are recorded in a per-session history of at most PROFILE_HISTORY_SIZE entries,
+# and SELECTs are explained with EXPLAIN FORMAT=JSON
+PROFILE_HISTORY_SIZE = 500
+EXPLAINABLE_RE = re.compile(r"^\s*(select|with)\b", re.I)
+
+class ConnectionPool:
+    """Bounded pool of MySQL connections for one server, user and database."""
+
+    def __init__(self, config, max_size=POOL_MAX_SIZE):
+        self.config = config
+        self.server = (config["host"], config["port"], config["user"])
+        self.database = config.get("database")
+        self.lock = threading.Lock()
+        self.slots = threading.BoundedSemaphore(max_size)
+        self.idle = []  # (connection, time it was returned)
+        self.leases = {}  # id(connection) -> (connection, time it was last used)
+
+    def acquire(self):
+        if not self.slots.acquire(timeout=POOL_ACQUIRE_TIMEOUT):
+            raise mysql.connector.errors.PoolError("All pooled connections are in use, please try again.")
+        try:
+            connection = self.checkout()
+        except BaseException:
+            self.slots.release()
+            raise
+        with self.lock:
+            self.leases[id(connection)] = (connection, time.monotonic())
+        return connection
+
+    def checkout(self):
+        while True:
+            with self.lock:
+                if not self.idle:
+                    break
+                connection, returned = self.idle.pop()
+            if time.monotonic() - returned < POOL_PING_AFTER:
+                return connection
+            try:
+                connection.ping()
+                return connection
+            except mysql.connector.Error:
+                self.discard(connection)
+        return mysql.connector.connect(**self.config)
+
+    def renew(self, connection):
+        """Mark a checked-out connection as in use; False if reap() has already reclaimed it."""
+        with self.lock:
+            if id(connection) not in self.leases:
+                return False
+            self.leases[id(connection)] = (connection, time.monotonic())
+            return True
+
+    def release(self, connection):
+        with self.lock:
+            if self.leases.pop(id(connection), None) is None:
+                return  # Already reclaimed by reap()
+        try:
+            # A connection with rows still unread is closed rather than drained,
+            # which could take as long as reading the rest of the result
+            if connection.unread_result:
+                connection.shutdown()
+                return
+            # Leave nothing of this session behind for the next borrower
+            connection.rollback()
+            connection.reset_session()
+            if self.database:
+                connection.cmd_init_db(self.database)
+            with self.lock:
+                self.idle.append((connection, time.monotonic()))
+        except mysql.connector.Error:
+            self.discard(connection)
+        finally:
+            self.slots.release()
+
+    @contextmanager
+    def connection(self):
+        connection = self.acquire()
+        try:
+            yield connection
+        finally:
+            self.release(connection)
+
+    def reap(self):
+        """Close idle connections past POOL_IDLE_TIMEOUT and reclaim leases past POOL_LEASE_TIMEOUT."""
+        now = time.monotonic()
+        with self.lock:
+            expired = [connection for connection, returned in self.idle if now - returned > POOL_IDLE_TIMEOUT]
+            self.idle = [(connection, returned) for connection, returned in self.idle
+                         if now - returned <= POOL_IDLE_TIMEOUT]
+            abandoned = [key for key, (connection, used) in self.leases.items()
+                         if now - used > POOL_LEASE_TIMEOUT]
+            abandoned = [self.leases.pop(key)[0] for key in abandoned]
+        for connection in expired + abandoned:
+            self.discard(connection)
+        for _ in abandoned:
+            self.slots.release()
+
+    @staticmethod
+    def discard(connection):
+        try:
+            connection.close()
+        except mysql.connector.Error:
+            pass
+
+class PoolRegistry:
+    """All pools of the process, with a background thread that reaps them."""
+
+    def __init__(self):
+        self.pools = {}
+        self.lock = threading.Lock()
+        threading.Thread(target=self.reap_forever, daemon=True).start()
+
+    def get(self, server, database=None):
+        # The password is part of the key, so a session can only reach a pool
+        # whose connections were opened with the password it supplied
+        password_hash = hashlib.sha256(server["password"].encode()).hexdigest()
+        key = (server["host"], server["port"], server["user"], database, password_hash)
+        with self.lock:
+            pool = self.pools.get(key)
+            if pool is None:
+                config = dict(server)
+                if database:
+                    config["database"] = database
+                pool = self.pools[key] = ConnectionPool(config)
+        return pool
+
+    def reap_forever(self):
+        while True:
+            time.sleep(POOL_REAP_INTERVAL)
+            with self.lock:
+                pools = list(self.pools.values())
+            for pool in pools:
+                pool.reap()
+
+@st.cache_resource
+def get_pools():
+    return PoolRegistry()
+
 # Set the page layout to wide
 st.set_page_config(layout="wide")
 st.title("MySQL Workbench")
@@ -9,12 +204,90 @@ st.title("MySQL Workbench")
 # Initialize session state variables if they don't exist
 if "messages" not in st.session_state:
     st.session_state["messages"] = []
-if "connection" not in st.session_state:
-    st.session_state["connection"] = None
-if "db_connection" not in st.session_state:
-    st.session_state["db_connection"] = None
+if "server" not in st.session_state:
+    st.session_state["server"] = None
+if "server_pool" not in st.session_state:
+    st.session_state["server_pool"] = None
+if "db_pool" not in st.session_state:
+    st.session_state["db_pool"] = None
 if "query_results" not in st.session_state:
     st.session_state["query_results"] = None
+if "result_cursor" not in st.session_state:
+    st.session_state["result_cursor"] = None
+if "session_lease" not in st.session_state:
+    st.session_state["session_lease"] = None
+if "query_history" not in st.session_state:
+    st.session_state["query_history"] = []
+if "query_plan" not in st.session_state:
+    st.session_state["query_plan"] = None
+if "result_stats" not in st.session_state:
+    st.session_state["result_stats"] = None
+
+def value_size(value):
+    """Approximate memory taken by a cached result, a DataFrame or a list of names."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    return sys.getsizeof(value) + sum(sys.getsizeof(item) for item in value)
+
+class QueryCache:
+    """LRU cache of query results with a time-to-live, invalidated by writes."""
+
+    def __init__(self, ttl=QUERY_CACHE_TTL, max_entries=QUERY_CACHE_SIZE, max_mb=QUERY_CACHE_MB):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_mb * 1024 * 1024
+        self.entries = OrderedDict()  # key -> (time stored, value, size in bytes)
+        self.bytes = 0
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry[0] > self.ttl:
+            self.remove(key)
+            return None
+        self.entries.move_to_end(key)
+        return entry[1]
+
+    def put(self, key, value, size=None):
+        if size is None:
+            size = value_size(value)
+        self.remove(key)
+        if size > self.max_bytes:
+            return
+        self.entries[key] = (time.monotonic(), value, size)
+        self.bytes += size
+        while len(self.entries) > self.max_entries or self.bytes > self.max_bytes:
+            self.remove(next(iter(self.entries)))
+
+    def remove(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry[2]
+
+    def invalidate(self, query, database):
+        """Drop the entries a statement other than a cacheable read may have changed."""
+        if USE_RE.match(query):
+            return
+        if DATABASE_DDL_RE.match(query):
+            self.entries.clear()
+            self.bytes = 0
+            return
+        match = WRITE_TABLES_RE.match(query)
+        if match is None:
+            # Statement we cannot attribute to tables: forget the whole database
+            stale = [key for key in self.entries if key[1] == database]
+        else:
+            names = [name.strip().strip("`").split(".")[-1].strip("`") for name in match.group(1).split(",")]
+            mentions = re.compile(r"\b(" + "|".join(re.escape(name) for name in names) + r")\b", re.I)
+            stale = [key for key in self.entries if mentions.search(key[2])]
+        if DDL_RE.match(query):
+            stale += [key for key in self.entries if key[2].lower().startswith("show")]
+        for key in set(stale):
+            self.remove(key)
+
+if "query_cache" not in st.session_state:
+    st.session_state["query_cache"] = QueryCache()
 
 def add_message(message, msg_type="success"):
     st.session_state["messages"].append((msg_type, message))
@@ -24,81 +297,332 @@ def add_message(message, msg_type="success"):
 
 def login_connection(host, user, password, port):
     try:
-        connection = mysql.connector.connect(
-            host=host,
-            user=user,
-            password=password,
-            port=port
-        )
-        if connection.is_connected():
+        server = {"host": host, "port": int(port), "user": user, "password": password}
+    except ValueError:
+        add_message("Please enter a valid port number.", "warning")
+        return None
+    try:
+        pool = get_pools().get(server)
+        with pool.connection() as connection:
+            connected = connection.is_connected()
+        if connected:
+            st.session_state["server"] = server
             add_message("Connected to MySQL Server", "success")
-            return connection
+            return pool
     except mysql.connector.Error as err:
         add_message(f"Error: {err}", "error")
     return None
 
-def main_connection(host, user, password, database, port):
+def main_connection(server, database):
     try:
-        connection = mysql.connector.connect(
-            host=host,
-            user=user,
-            password=password,
-            database=database,
-            port=port
-        )
-        if connection.is_connected():
+        pool = get_pools().get(server, database)
+        with pool.connection() as connection:
+            connected = connection.is_connected()
+        if connected:
             add_message(f"Connected to MySQL database: {database}", "success")
-            return connection
+            return pool
     except mysql.connector.Error as err:
         add_message(f"Error: {err}", "error")
     return None
 
-def fetch_databases(connection):
-    cursor = connection.cursor()
+def normalize_query(query):
+    """Collapse whitespace outside quotes and drop trailing semicolons so equivalent queries share a cache entry."""
+    return QUOTED_OR_SPACE_RE.sub(lambda match: match.group(1) or " ", query.strip()).rstrip(";").rstrip()
+
+def cache_key(pool, query):
+    return (pool.server, pool.database, normalize_query(query))
+
+def fetch_databases(pool):
+    cache = st.session_state["query_cache"]
+    key = cache_key(pool, "SHOW DATABASES")
+    databases = cache.get(key)
+    if databases is not None:
+        return databases
     try:
-        cursor.execute("SHOW DATABASES")
-        results = cursor.fetchall()
+        with pool.connection() as connection:
+            cursor = connection.cursor()
+            try:
+                cursor.execute("SHOW DATABASES")
+                results = cursor.fetchall()
+            finally:
+                cursor.close()
         databases = [row[0] for row in results]
+        cache.put(key, databases)
         return databases
     except mysql.connector.Error as err:
         add_message(f"Error: {err}", "error")
-    finally:
-        cursor.close()
 
-def create_database(connection, database_name):
-    cursor = connection.cursor()
+def create_database(pool, database_name):
     try:
-        cursor.execute(f"CREATE DATABASE {database_name}")
+        with pool.connection() as connection:
+            cursor = connection.cursor()
+            try:
+                cursor.execute(f"CREATE DATABASE {database_name}")
+            finally:
+                cursor.close()
+        st.session_state["query_cache"].invalidate(f"CREATE DATABASE {database_name}", None)
         add_message(f"Database {database_name} created successfully", "success")
     except mysql.connector.Error as err:
         add_message(f"Error: {err}", "error")
-    finally:
-        cursor.close()
 
-def execute_query(connection, query, limit=None):
+def session_connection(pool):
+    """The connection this session keeps checked out from pool, taking one on first use."""
+    lease = st.session_state["session_lease"]
+    if lease is not None:
+        if lease[0] is pool and pool.renew(lease[1]):
+            return lease[1]
+        if lease[0] is pool:
+            add_message("The session was idle too long; its connection was closed and session settings reset.",
+                        "warning")
+        release_session_connection()
+    connection = pool.acquire()
+    st.session_state["session_lease"] = (pool, connection)
+    return connection
+
+def release_session_connection():
+    """Hand the session's connection back to its pool, which closes it if result rows are left unread."""
+    lease = st.session_state["session_lease"]
+    st.session_state["result_cursor"] = None
+    st.session_state["session_lease"] = None
+    if lease is not None:
+        pool, connection = lease
+        pool.release(connection)
+
+def close_result():
+    """Close the open streamed result; with rows unread the session's connection is given up, not drained."""
+    cursor = st.session_state["result_cursor"]
+    st.session_state["result_cursor"] = None
+    if cursor is None:
+        return
+    if st.session_state["session_lease"][1].unread_result:
+        release_session_connection()
+    else:
+        try:
+            cursor.close()
+        except mysql.connector.Error:
+            pass
+
+def fetch_rows(max_rows=None):
+    """Fetch up to max_rows more rows (all, if None) of the open result into the results table."""
+    cursor = st.session_state["result_cursor"]
+    stats = st.session_state["result_stats"]
+    # Chunks are built with positional column labels and named once at the
+    # end, so results with duplicate column names concatenate cleanly
+    frames = []
+    if stats["rows"]:
+        frames.append(st.session_state["query_results"].set_axis(range(len(stats["columns"])), axis=1))
+    fetched = 0
+    while max_rows is None or fetched < max_rows:
+        size = FETCH_CHUNK_SIZE if max_rows is None else min(FETCH_CHUNK_SIZE, max_rows - fetched)
+        start = time.perf_counter()
+        rows = cursor.fetchmany(size)
+        stats["fetch"] += time.perf_counter() - start
+        if not rows:
+            stats["exhausted"] = True
+            break
+        start = time.perf_counter()
+        frame = pd.DataFrame(rows)
+        frames.append(frame)
+        fetched += len(rows)
+        stats["bytes"] += int(frame.memory_usage(deep=True).sum())
+        stats["frame"] += time.perf_counter() - start
+        if stats["bytes"] >= MAX_RESULT_MB * 1024 * 1024:
+            stats["capped"] = True
+            break
+
+    start = time.perf_counter()
+    if frames:
+        df = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+        st.session_state["query_results"] = df.set_axis(stats["columns"], axis=1)
+    stats["frame"] += time.perf_counter() - start
+    stats["rows"] += fetched
+    if stats["history"] is not None:
+        stats["history"].update(rows=stats["rows"], fetch_ms=round(stats["fetch"] * 1000, 2),
+                                frame_ms=round(stats["frame"] * 1000, 2))
+    if stats["exhausted"]:
+        close_result()
+        # Only complete results are cached
+        if stats["cache_key"] is not None:
+            st.session_state["query_cache"].put(stats["cache_key"], st.session_state["query_results"], stats["bytes"])
+
+def record_history(pool, query, stats):
+    """Append a statement's timings to the session's query history and return the entry."""
+    entry = {"time": time.strftime("%Y-%m-%d %H:%M:%S"), "database": pool.database, "query": query,
+             "cached": stats["cached"], "rows": stats["rows"], "execute_ms": round(stats["execute"] * 1000, 2),
+             "fetch_ms": round(stats["fetch"] * 1000, 2), "frame_ms": round(stats["frame"] * 1000, 2)}
+    history = st.session_state["query_history"]
+    history.append(entry)
+    del history[:-PROFILE_HISTORY_SIZE]
+    return entry
+
+def plan_table_row(table):
+    """One row of the plan summary for a table access in an EXPLAIN FORMAT=JSON plan."""
+    access_type = table.get("access_type", "")
+    possible_keys = table.get("possible_keys") or []
+    if access_type == "ALL":
+        issue = "Full table scan" if possible_keys else "Full table scan, no usable index"
+    elif access_type == "index":
+        issue = "Full index scan"
+    else:
+        issue = ""
+    return {"table": table.get("table_name"), "access_type": access_type, "key": table.get("key", ""),
+            "possible_keys": ", ".join(possible_keys), "rows_examined": table.get("rows_examined_per_scan"),
+            "filtered (%)": table.get("filtered"), "issue": issue}
+
+def explain_query(pool, query):
+    """Run EXPLAIN FORMAT=JSON for a SELECT and summarise the table accesses of its plan."""
+    def explain(connection):
+        cursor = connection.cursor()
+        try:
+            cursor.execute(f"EXPLAIN FORMAT=JSON {query}")
+            return cursor.fetchall()[0][0]
+        finally:
+            cursor.close()
+
+    # On the session's own connection, which sees its temporary tables and
+    # variables, unless that one is still streaming the query's rows
+    if st.session_state["result_cursor"] is None:
+        value = explain(session_connection(pool))
+    else:
+        with pool.connection() as connection:
+            value = explain(connection)
+    plan = json.loads(value.decode() if isinstance(value, (bytes, bytearray)) else value)
+
+    tables = []
+    notes = []
+    def walk(node):
+        if isinstance(node, dict):
+            table = node.get("table")
+            if isinstance(table, dict) and "table_name" in table:
+                tables.append(plan_table_row(table))
+            if node.get("using_filesort"):
+                notes.append("Using filesort")
+            if node.get("using_temporary_table"):
+                notes.append("Using temporary table")
+            for value in node.values():
+                walk(value)
+        elif isinstance(node, list):
+            for item in node:
+                walk(item)
+    walk(plan)
+    cost = plan.get("query_block", {}).get("cost_info", {}).get("query_cost")
+    return {"plan": plan, "cost": cost, "tables": pd.DataFrame(tables), "notes": sorted(set(notes))}
+
+def highlight_plan(tables):
+    """Colour full table scans red when no index could be used, and other full scans amber."""
+    def colour(row):
+        if row["issue"].endswith("no usable index"):
+            style = "background-color: #f8d7da"
+        elif row["issue"]:
+            style = "background-color: #fff3cd"
+        else:
+            style = ""
+        return [style] * len(row)
+    return tables.style.apply(colour, axis=1)
+
+def execute_query(pool, query, limit=None):
+    close_result()
+    st.session_state["query_plan"] = None
+    profile = st.session_state.get("profile", False)
+    # For SELECT queries, apply the selected limit
+    if query.strip().lower().startswith("select") and limit:
+        query = f"{query.strip()} LIMIT {limit}"
+
+    # Pooled connections are reset to the pool's database when released, so
+    # USE switches the session to the pool of the other database instead, and
+    # to a new connection from it
+    match = USE_RE.match(query)
+    if match:
+        db_pool = main_connection(st.session_state["server"], match.group(1))
+        if db_pool:
+            release_session_connection()
+            st.session_state["db_pool"] = db_pool
+            st.session_state["query_results"] = None
+        st.rerun()
+
+    cache = st.session_state["query_cache"]
+    database = pool.database
+    key = None
+    if CACHEABLE_RE.match(query) and not UNCACHEABLE_RE.search(query):
+        key = cache_key(pool, query)
+        df = cache.get(key)
+        if df is not None:
+            st.session_state["query_results"] = df
+            stats = {"columns": list(df.columns), "rows": len(df), "bytes": 0, "exhausted": True, "capped": False,
+                     "execute": 0.0, "fetch": 0.0, "frame": 0.0, "cache_key": key, "cached": True, "history": None}
+            if profile:
+                record_history(pool, query, stats)
+            st.session_state["result_stats"] = stats
+            add_message(f"{query} served from cache.", "info")
+            st.rerun()
+    elif query.strip():
+        cache.invalidate(query, database)
+
+    try:
+        connection = session_connection(pool)
+    except mysql.connector.Error as err:
+        st.session_state["query_results"] = None
+        add_message(f"Error: {err}", "error")
+        st.rerun()
     cursor = connection.cursor()
     try:
-        # For SELECT queries, apply the selected limit
-        if query.strip().lower().startswith("select") and limit:
-            query = f"{query.strip()} LIMIT {limit}"
+        start = time.perf_counter()
         cursor.execute(query)
         if not query.strip():
             add_message("Please enter a valid SQL query.", "warning")  
         elif cursor.description:
             columns = [desc[0] for desc in cursor.description]
-            results = cursor.fetchall()
-            df = pd.DataFrame(results, columns=columns)
-            st.session_state["query_results"] = df
+            st.session_state["query_results"] = pd.DataFrame(columns=columns)
+            st.session_state["result_cursor"] = cursor
+            stats = {"columns": columns, "rows": 0, "bytes": 0, "exhausted": False, "capped": False,
+                     "execute": time.perf_counter() - start, "fetch": 0.0, "frame": 0.0,
+                     "cache_key": key, "cached": False, "history": None}
+            if profile:
+                stats["history"] = record_history(pool, query, stats)
+            st.session_state["result_stats"] = stats
+            fetch_rows(FETCH_CHUNK_SIZE)
             add_message(f"{query} executed successfully.", "info")
         else:
             connection.commit()
+            if profile:
+                record_history(pool, query, {"cached": False, "rows": cursor.rowcount, "fetch": 0.0, "frame": 0.0,
+                                             "execute": time.perf_counter() - start})
             st.session_state["query_results"] = None
             add_message(f"{query} executed successfully.", "info")
     except mysql.connector.Error as err:
         st.session_state["query_results"] = None
+        st.session_state["result_cursor"] = None
+        # Give up a connection that was lost or is stuck with unread rows
+        if connection.unread_result or not connection.is_connected():
+            release_session_connection()
         add_message(f"Error: {err}", "error")
+        profile = False
     finally:
-        cursor.close()
+        # The cursor stays open while a streamed result is being read
+        if st.session_state["result_cursor"] is not cursor:
+            try:
+                cursor.close()
+            except mysql.connector.Error:
+                pass
+
+    if profile and EXPLAINABLE_RE.match(query):
+        try:
+            st.session_state["query_plan"] = explain_query(pool, query)
+        except (mysql.connector.Error, ValueError) as err:
+            add_message(f"EXPLAIN failed: {err}", "warning")
+    st.rerun()
+
+def load_more_rows(max_rows=None):
+    pool, connection = st.session_state["session_lease"]
+    if not pool.renew(connection):
+        release_session_connection()
+        add_message("The result was closed after being left idle too long.", "warning")
+        st.rerun()
+    try:
+        fetch_rows(max_rows)
+    except mysql.connector.Error as err:
+        release_session_connection()
+        add_message(f"Error: {err}", "error")
     st.rerun()
 
 def calculate_table_height(df, row_height=36, max_height=362):
@@ -118,10 +642,10 @@ with col1:
     password = st.text_input("Enter Password", type="password")
 
     if st.button("Login"):
-        st.session_state["connection"] = login_connection(host, user, password, port)
+        st.session_state["server_pool"] = login_connection(host, user, password, port)
 
-    if st.session_state["connection"]:
-        databases = fetch_databases(st.session_state["connection"]) or []
+    if st.session_state["server_pool"]:
+        databases = fetch_databases(st.session_state["server_pool"]) or []
         col3, col4 = st.columns(2)
         with col3:
             database = st.selectbox("Select Existing Database", ["No Database Selected"] + databases)
@@ -129,8 +653,8 @@ with col1:
                 if database == "No Database Selected":
                     add_message("Please select a valid database.", "warning")
                 else:
-                    st.session_state["db_connection"] = main_connection(host, user, password, database, port)
-                    execute_query(st.session_state["db_connection"], f"USE {database}")
+                    release_session_connection()
+                    st.session_state["db_pool"] = main_connection(st.session_state["server"], database)
         with col4:
             new_database = st.text_input("Create and Select New Database")
             if st.button("Create Database"):
@@ -139,9 +663,9 @@ with col1:
                 elif not new_database:
                     add_message("Please enter a valid database name.", "warning")
                 else:
-                    create_database(st.session_state["connection"], new_database)
-                    st.session_state["db_connection"] = main_connection(host, user, password, new_database, port)
-                    execute_query(st.session_state["db_connection"], f"USE {new_database}")
+                    create_database(st.session_state["server_pool"], new_database)
+                    release_session_connection()
+                    st.session_state["db_pool"] = main_connection(st.session_state["server"], new_database)
 
     # --- Messages Container at Bottom Left ---
     st.markdown("---")
@@ -159,7 +683,7 @@ with col1:
 
 with col2:
     # --- Query Execution Section ---
-    if st.session_state["db_connection"]:
+    if st.session_state["db_pool"]:
         query = st.text_area("Enter SQL Query", height=165)
         col5, col6, col7, col8 = st.columns([0.55, 0.60, 2, 1])
         with col8:
@@ -167,25 +691,72 @@ with col2:
             limit_value = None
             if limit != "Don't Limit":
                 limit_value = int(limit.split()[2])
+            st.toggle("Profile queries", key="profile")
         with col5:
             if st.button("Execute Query"):
-                execute_query(st.session_state["db_connection"], query, limit=limit_value)
+                execute_query(st.session_state["db_pool"], query, limit=limit_value)
         with col6:
             if st.button("Show Databases"):
-                execute_query(st.session_state["db_connection"], "SHOW DATABASES")
+                execute_query(st.session_state["db_pool"], "SHOW DATABASES")
         with col7:
-            current_database = st.session_state["db_connection"].database if st.session_state["db_connection"] else "Database"
+            current_database = st.session_state["db_pool"].database
             if st.button(f"Show Tables of {current_database}"):
-                execute_query(st.session_state["db_connection"], "SHOW TABLES")
+                execute_query(st.session_state["db_pool"], "SHOW TABLES")
         
         # --- Output Section ---
         st.markdown("---")
         st.subheader("Query Results")
         if st.session_state["query_results"] is not None:
+            stats = st.session_state["result_stats"]
+            if stats["cached"]:
+                state = "served from cache"
+            elif stats["exhausted"]:
+                state = "all rows fetched"
+            elif stats["capped"]:
+                state = f"stopped at the {MAX_RESULT_MB} MB memory cap"
+            else:
+                state = "more rows available"
+            elapsed = stats["execute"] + stats["fetch"] + stats["frame"]
+            st.caption(f"{stats['rows']:,} rows fetched in {elapsed:.2f}s ({state})")
+            if st.session_state["result_cursor"] is not None and not stats["capped"]:
+                col9, col10, _ = st.columns([1, 1, 4])
+                with col9:
+                    if st.button(f"Load {FETCH_CHUNK_SIZE:,} more rows"):
+                        load_more_rows(FETCH_CHUNK_SIZE)
+                with col10:
+                    if st.button("Load all rows"):
+                        load_more_rows()
             table_height = calculate_table_height(st.session_state["query_results"])
             st.dataframe(st.session_state["query_results"], height=table_height, use_container_width=True)  # Set a dynamic height for the table
         else:
             st.info("No results to display.")
+
+        # --- Profiling Section ---
+        if st.session_state.get("profile"):
+            st.markdown("---")
+            st.subheader("Query Profile")
+            history = st.session_state["query_history"]
+            if history:
+                last = history[-1]
+                col11, col12, col13 = st.columns(3)
+                col11.metric("Execute", f"{last['execute_ms']:,.1f} ms")
+                col12.metric("Fetch", f"{last['fetch_ms']:,.1f} ms")
+                col13.metric("DataFrame", f"{last['frame_ms']:,.1f} ms")
+
+            plan = st.session_state["query_plan"]
+            if plan is not None:
+                st.caption(f"Estimated query cost: {plan['cost']}")
+                for note in plan["notes"]:
+                    st.warning(note)
+                if not plan["tables"].empty:
+                    st.dataframe(highlight_plan(plan["tables"]), use_container_width=True)
+                with st.expander("EXPLAIN FORMAT=JSON"):
+                    st.json(plan["plan"])
+
+            if history:
+                st.download_button("Export History as CSV", pd.DataFrame(history).to_csv(index=False),
+                                   file_name="query_history.csv", mime="text/csv")
+                st.dataframe(pd.DataFrame(history[::-1]), height=calculate_table_height(history), use_container_width=True)
     else:
         st.markdown(
             """
@@ -1,32 +1,791 @@
 
+import os
+import re
+import csv
+import json
+import time
+import zlib
+import random
+import sqlite3
+import hashlib
+import argparse
+import threading
+from decimal import Decimal
+from functools import partial
+from email.utils import parsedate_to_datetime
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from urllib.parse import urljoin, urlsplit
+from urllib.robotparser import RobotFileParser
+
 import requests
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
 
+# Faster parser backends, used when installed
+try:
+    from lxml import etree
+    from lxml import html as lxml_html
+except ImportError:
+    lxml_html = None
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
 # URL of the website
 url = "http://books.toscrape.com/"
 
-# Send a GET request to fetch the raw HTML content
-response = requests.get(url)
-
-# Parse the page content using BeautifulSoup
-soup = BeautifulSoup(response.text, 'html.parser')
-
-# Find all book containers (each book is within a `article` tag with class `product_pod`)
-books = soup.find_all('article', class_='product_pod')
-
-# Loop through each book and extract details
-for book in books:
-    # Get the book title
-    title = book.find('h3').find('a')['title']
-    
-    # Get the book price
-    price = book.find('p', class_='price_color').text
-    
-    # Get the book's link
-    link = book.find('h3').find('a')['href']
-    
-    # Print the details
-    print(f"Title: {title}")
-    print(f"Price: {price}")
-    print(f"Link: {url + link}")
-    print("-" * 50)
+# Crawler settings: worker threads, simultaneous requests to any one host, and
+# seconds to wait for a response
+MAX_WORKERS = 16
+PER_HOST_CONCURRENCY = 8
+REQUEST_TIMEOUT = 30
+
+# At most MAX_PENDING pages are queued on the thread pool. The rest of the
+# crawl waits in the frontier, an SQLite table that survives interruptions, so
+# a stopped crawl resumes where it left off. Detail pages are taken before
+# further listing pages.
+MAX_PENDING = 4 * MAX_WORKERS
+FRONTIER_PATH = "books_frontier.sqlite"
+
+# Politeness: each host gets a token bucket refilled at REQUESTS_PER_SECOND
+# (lowered to the host's robots.txt Crawl-delay or Request-rate) holding at
+# most BURST tokens, or the rate's worth if that is lower, but at least one.
+# Responses with a RETRY_STATUSES code and connection errors are retried up
+# to MAX_RETRIES times with exponential backoff and full jitter, or after the
+# server's Retry-After, during which the whole host is paused.
+USER_AGENT = "books-scraper/1.0"
+REQUESTS_PER_SECOND = 20
+BURST = 20
+MAX_RETRIES = 5
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 60
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Responses are kept in an SQLite cache between runs and revalidated with
+# If-None-Match / If-Modified-Since, so an unchanged page costs a 304 without a
+# body. Pages fetched less than CACHE_FRESH_SECONDS ago are not requested at all.
+HTTP_CACHE_PATH = "books_cache.sqlite"
+CACHE_FRESH_SECONDS = 0
+
+# Output sinks buffer SINK_BATCH_SIZE records and write them out together
+SINK_BATCH_SIZE = 500
+
+# Star ratings are given as a class name, e.g. <p class="star-rating Three">
+RATINGS = {"One": 1, "Two": 2, "Three": 3, "Four": 4, "Five": 5}
+
+# A requests session that also holds the rate limit of every host it talks to
+class PoliteSession(requests.Session):
+    def __init__(self, rate=REQUESTS_PER_SECOND):
+        super().__init__()
+        self.rate = rate
+        self.buckets = {}
+        self.buckets_lock = threading.Lock()
+
+    def bucket(self, page_url):
+        host = urlsplit(page_url).netloc
+        with self.buckets_lock:
+            if host not in self.buckets:
+                self.buckets[host] = TokenBucket(self.rate, min(BURST, self.rate))
+            return self.buckets[host]
+
+# One keep-alive session shared by all workers, with a connection pool large
+# enough that no worker has to wait for a socket
+def make_session(max_workers=MAX_WORKERS, rate=REQUESTS_PER_SECOND):
+    session = PoliteSession(rate)
+    session.headers["User-Agent"] = USER_AGENT
+    adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+# Requests in flight per host are capped with one semaphore per host
+host_slots = {}
+host_slots_lock = threading.Lock()
+
+def host_slot(page_url):
+    host = urlsplit(page_url).netloc
+    with host_slots_lock:
+        if host not in host_slots:
+            host_slots[host] = threading.BoundedSemaphore(PER_HOST_CONCURRENCY)
+        return host_slots[host]
+
+class HttpCache:
+    """Response bodies with their validators, shared by all worker threads."""
+
+    def __init__(self, path=HTTP_CACHE_PATH):
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.lock, self.db:
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("PRAGMA synchronous=NORMAL")
+            self.db.execute("""CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, digest TEXT, body BLOB, fetched_at REAL)""")
+
+    def get(self, page_url):
+        with self.lock:
+            row = self.db.execute("SELECT etag, last_modified, digest, body, fetched_at FROM responses WHERE url = ?",
+                                  (page_url,)).fetchone()
+        if row is None:
+            return None
+        etag, last_modified, digest, body, fetched_at = row
+        return {"etag": etag, "last_modified": last_modified, "digest": digest,
+                "body": zlib.decompress(body), "fetched_at": fetched_at}
+
+    def store(self, entry):
+        page_url, etag, last_modified, digest, content = entry
+        with self.lock, self.db:
+            self.db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                            (page_url, etag, last_modified, digest, zlib.compress(content), time.time()))
+
+    def touch(self, page_url):
+        with self.lock, self.db:
+            self.db.execute("UPDATE responses SET fetched_at = ? WHERE url = ?", (time.time(), page_url))
+
+    def close(self):
+        self.db.close()
+
+# Token bucket refilled at rate tokens per second; one token per request.
+# The capacity is at least one token, or acquire() could never succeed.
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    # Block until a request may be sent
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                if now >= self.updated:
+                    self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                    self.updated = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    delay = (1 - self.tokens) / self.rate
+                else:
+                    delay = self.updated - now  # Paused
+            time.sleep(delay)
+
+    # Send nothing for the next seconds, then start again with an empty bucket
+    def pause(self, seconds):
+        with self.lock:
+            self.tokens = 0
+            self.updated = max(self.updated, time.monotonic() + seconds)
+
+    def limit_rate(self, rate):
+        with self.lock:
+            self.rate = min(self.rate, rate)
+            self.capacity = min(self.capacity, max(1, rate))
+
+def backoff_delay(attempt):
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+# Seconds to wait from a Retry-After header, given as seconds or an HTTP date
+def retry_after(response):
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    if value.strip().isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+# GET a page within the host's rate limit, retrying throttled, failed and
+# unreachable requests. The last response is returned even if it is an error.
+def polite_get(session, page_url, headers=None):
+    bucket = session.bucket(page_url)
+    for attempt in range(MAX_RETRIES + 1):
+        bucket.acquire()
+        try:
+            with host_slot(page_url):
+                response = session.get(page_url, headers=headers, timeout=REQUEST_TIMEOUT)
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt == MAX_RETRIES:
+                raise
+            time.sleep(backoff_delay(attempt))
+            continue
+        if response.status_code not in RETRY_STATUSES or attempt == MAX_RETRIES:
+            return response
+
+        delay = retry_after(response)
+        if delay is not None or response.status_code == 429:
+            # The server asked us to slow down: hold back every request to the host
+            bucket.pause(backoff_delay(attempt) if delay is None else delay + random.uniform(0, BACKOFF_BASE))
+        else:
+            time.sleep(backoff_delay(attempt))
+
+# robots.txt rules per host, fetched the first time a host is visited. As with
+# urllib.robotparser, a 401 or 403 disallows the whole host and any other 4xx
+# allows it; a host whose robots.txt cannot be fetched at all is not crawled.
+class RobotsRules:
+    def __init__(self, session):
+        self.session = session
+        self.parsers = {}
+
+    def parser(self, page_url):
+        scheme, host = urlsplit(page_url)[:2]
+        if host not in self.parsers:
+            robots = RobotFileParser(f"{scheme}://{host}/robots.txt")
+            try:
+                response = polite_get(self.session, robots.url)
+            except requests.RequestException:
+                robots.disallow_all = True
+            else:
+                if response.status_code in (401, 403) or response.status_code >= 500:
+                    robots.disallow_all = True
+                elif response.status_code >= 400:
+                    robots.allow_all = True
+                else:
+                    robots.parse(response.text.splitlines())
+                    delay = robots.crawl_delay(USER_AGENT)
+                    rate = robots.request_rate(USER_AGENT)
+                    if delay:
+                        self.session.bucket(page_url).limit_rate(1 / float(delay))
+                    if rate:
+                        self.session.bucket(page_url).limit_rate(rate.requests / rate.seconds)
+            self.parsers[host] = robots
+        return self.parsers[host]
+
+    def allowed(self, page_url):
+        return self.parser(page_url).can_fetch(USER_AGENT, page_url)
+
+# The crawl frontier: every URL found, with its state. Used from the crawling
+# thread only.
+class Frontier:
+    def __init__(self, path=FRONTIER_PATH):
+        self.db = sqlite3.connect(path)
+        with self.db:
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("PRAGMA synchronous=NORMAL")
+            self.db.execute("""CREATE TABLE IF NOT EXISTS frontier (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, url TEXT UNIQUE, kind TEXT, book TEXT,
+                state TEXT NOT NULL DEFAULT 'pending')""")
+            self.db.execute("CREATE INDEX IF NOT EXISTS frontier_state ON frontier (state, kind, id)")
+            # Pages in flight when the last run stopped are fetched again
+            self.db.execute("UPDATE frontier SET state = 'pending' WHERE state = 'active'")
+
+    def has_pending(self):
+        return self.db.execute("SELECT 1 FROM frontier WHERE state = 'pending' LIMIT 1").fetchone() is not None
+
+    def reset(self):
+        with self.db:
+            self.db.execute("DELETE FROM frontier")
+
+    def add(self, page_url, kind, book=None):
+        with self.db:
+            self.db.execute("INSERT OR IGNORE INTO frontier (url, kind, book) VALUES (?, ?, ?)",
+                            (page_url, kind, json.dumps(book) if book else None))
+
+    def add_many(self, pages):
+        with self.db:
+            self.db.executemany("INSERT OR IGNORE INTO frontier (url, kind, book) VALUES (?, ?, ?)",
+                                [(page_url, kind, json.dumps(book) if book else None) for page_url, kind, book in pages])
+
+    # Take up to limit pending pages, detail pages first, and mark them active
+    def take(self, limit):
+        rows = self.db.execute("""SELECT id, url, kind, book FROM frontier WHERE state = 'pending'
+                                  ORDER BY kind = 'detail' DESC, id LIMIT ?""", (limit,)).fetchall()
+        with self.db:
+            self.db.executemany("UPDATE frontier SET state = 'active' WHERE id = ?", [(row[0],) for row in rows])
+        return [(page_url, kind, json.loads(book) if book else None) for _, page_url, kind, book in rows]
+
+    def finish(self, page_url, state="done"):
+        with self.db:
+            self.db.execute("UPDATE frontier SET state = ? WHERE url = ?", (state, page_url))
+
+    def close(self):
+        self.db.close()
+
+# Fetch a page, revalidating any cached copy. Returns the body, whether it
+# differs from the cached copy, the bytes downloaded, and the cache entry to
+# store for it (None if nothing needs storing). Unless store is False the entry
+# is stored straight away.
+def fetch(session, page_url, cache=None, store=True):
+    cached = cache.get(page_url) if cache else None
+    if cached and time.time() - cached["fetched_at"] < CACHE_FRESH_SECONDS:
+        return cached["body"], False, 0, None
+
+    headers = {}
+    if cached and cached["etag"]:
+        headers["If-None-Match"] = cached["etag"]
+    if cached and cached["last_modified"]:
+        headers["If-Modified-Since"] = cached["last_modified"]
+    response = polite_get(session, page_url, headers)
+    if response.status_code == 304 and cached:
+        cache.touch(page_url)
+        return cached["body"], False, 0, None
+    response.raise_for_status()
+
+    # Raw bytes, so the parser honours the page's <meta charset> (the server
+    # sends no charset header and requests would fall back to ISO-8859-1)
+    content = response.content
+    digest = hashlib.sha1(content).hexdigest()
+    entry = None
+    if cache:
+        entry = (page_url, response.headers.get("ETag"), response.headers.get("Last-Modified"), digest, content)
+        if store:
+            cache.store(entry)
+            entry = None
+    return content, cached is None or cached["digest"] != digest, len(content), entry
+
+def rating_from_class(class_names):
+    for name in class_names.split():
+        if name in RATINGS:
+            return RATINGS[name]
+    return None
+
+# Parser backends. Each turns a listing page into its books (title, price,
+# link, rating, availability) and the URL of the next page in one pass over the
+# product pods, and a detail page into the book's UPC, availability and
+# description. Selectors are compiled once per backend instance.
+class Bs4Parser:
+    name = "bs4"
+
+    def parse_listing(self, html, page_url):
+        soup = BeautifulSoup(html, 'html.parser')
+        books = []
+        # Find all book containers (each book is within a `article` tag with class `product_pod`)
+        for book in soup.find_all('article', class_='product_pod'):
+            anchor = book.h3.a
+            books.append({
+                "title": anchor['title'],
+                "price": book.find('p', class_='price_color').text,
+                # Links are relative to the page they appear on
+                "link": urljoin(page_url, anchor['href']),
+                "rating": rating_from_class(" ".join(book.find('p', class_='star-rating')['class'])),
+                "availability": book.find('p', class_='availability').text.strip(),
+            })
+        next_link = soup.select_one('li.next > a')
+        return books, urljoin(page_url, next_link['href']) if next_link else None
+
+    def parse_detail(self, html):
+        soup = BeautifulSoup(html, 'html.parser')
+        product = {row.th.text: row.td.text for row in soup.select('table.table-striped tr')}
+        description = soup.select_one('#product_description + p')
+        return {"upc": product.get("UPC"), "availability": product.get("Availability"),
+                "description": description.text if description else None}
+
+class LxmlParser:
+    name = "lxml"
+
+    def __init__(self):
+        self.pods = etree.XPath("//article[contains(concat(' ', normalize-space(@class), ' '), ' product_pod ')]")
+        self.anchor = etree.XPath("h3/a")
+        self.price = etree.XPath("string(.//p[contains(@class, 'price_color')])")
+        self.rating = etree.XPath("string(.//p[contains(@class, 'star-rating')]/@class)")
+        self.availability = etree.XPath("normalize-space(.//p[contains(@class, 'availability')])")
+        self.next_link = etree.XPath("string(//li[@class='next']/a/@href)")
+        self.product_rows = etree.XPath("//table[contains(@class, 'table-striped')]//tr")
+        self.description = etree.XPath("string(//div[@id='product_description']/following-sibling::p[1])")
+
+    def parse_listing(self, html, page_url):
+        root = lxml_html.fromstring(html)
+        books = []
+        for pod in self.pods(root):
+            anchor = self.anchor(pod)[0]
+            books.append({
+                "title": anchor.get('title'),
+                "price": self.price(pod),
+                "link": urljoin(page_url, anchor.get('href')),
+                "rating": rating_from_class(self.rating(pod)),
+                "availability": self.availability(pod),
+            })
+        next_href = self.next_link(root)
+        return books, urljoin(page_url, next_href) if next_href else None
+
+    def parse_detail(self, html):
+        root = lxml_html.fromstring(html)
+        product = {row.findtext('th'): row.findtext('td') for row in self.product_rows(root)}
+        return {"upc": product.get("UPC"), "availability": product.get("Availability"),
+                "description": self.description(root) or None}
+
+class SelectolaxParser:
+    name = "selectolax"
+
+    def parse_listing(self, html, page_url):
+        tree = LexborHTMLParser(html)
+        books = []
+        for pod in tree.css('article.product_pod'):
+            anchor = pod.css_first('h3 > a')
+            books.append({
+                "title": anchor.attributes['title'],
+                "price": pod.css_first('p.price_color').text(),
+                "link": urljoin(page_url, anchor.attributes['href']),
+                "rating": rating_from_class(pod.css_first('p.star-rating').attributes['class']),
+                "availability": pod.css_first('p.availability').text(strip=True),
+            })
+        next_link = tree.css_first('li.next > a')
+        return books, urljoin(page_url, next_link.attributes['href']) if next_link else None
+
+    def parse_detail(self, html):
+        tree = LexborHTMLParser(html)
+        product = {row.css_first('th').text(): row.css_first('td').text()
+                   for row in tree.css('table.table-striped tr')}
+        description = tree.css_first('#product_description + p')
+        return {"upc": product.get("UPC"), "availability": product.get("Availability"),
+                "description": description.text() if description else None}
+
+PARSERS = {"bs4": Bs4Parser}
+if lxml_html is not None:
+    PARSERS["lxml"] = LxmlParser
+if LexborHTMLParser is not None:
+    PARSERS["selectolax"] = SelectolaxParser
+
+# Fastest backend that is installed
+DEFAULT_PARSER = next(name for name in ("selectolax", "lxml", "bs4") if name in PARSERS)
+
+# Each worker thread gets its own parser instances, as compiled XPath
+# expressions must not be evaluated from several threads at once
+parser_local = threading.local()
+
+def get_parser(name):
+    parsers = parser_local.__dict__.setdefault("parsers", {})
+    if name not in parsers:
+        parsers[name] = PARSERS[name]()
+    return parsers[name]
+
+# Fetch a listing page and return its books and the URL of the next page,
+# with the bytes downloaded
+def fetch_listing(session, page_url, parser=DEFAULT_PARSER, cache=None):
+    content, changed, size, _ = fetch(session, page_url, cache)
+    books, next_url = get_parser(parser).parse_listing(content, page_url)
+    return "listing", books, next_url, size
+
+# Fetch a book's detail page and add the details to the book. Its cache entry
+# is returned rather than stored, so that a book is only marked as seen once
+# it has been emitted.
+def fetch_detail(session, book, parser=DEFAULT_PARSER, cache=None):
+    content, changed, size, entry = fetch(session, book["link"], cache, store=False)
+    book.update(get_parser(parser).parse_detail(content))
+    return "detail", book, changed, size, entry
+
+# Time every available backend on saved listing and detail pages, and check
+# that they all extract the same records
+def benchmark_parsers(paths, repeat=5):
+    pages = []
+    for path in paths:
+        with open(path, 'rb') as f:
+            html = f.read()
+        pages.append((b'product_pod' in html, html))
+
+    results = {}
+    timings = {}
+    for name, parser_class in PARSERS.items():
+        parser = parser_class()
+        start = time.perf_counter()
+        for _ in range(repeat):
+            output = [parser.parse_listing(html, url) if is_listing else parser.parse_detail(html)
+                      for is_listing, html in pages]
+        timings[name] = (time.perf_counter() - start) / (repeat * len(pages))
+        results[name] = output
+
+    baseline = timings["bs4"]
+    for name, seconds in timings.items():
+        same = "same output" if results[name] == results["bs4"] else "OUTPUT DIFFERS from bs4"
+        print(f"{name:>10}: {seconds * 1000:7.3f} ms/page  {baseline / seconds:5.1f}x bs4  ({same})")
+    return timings
+
+# Output records: the scraped fields with the price split into a Decimal
+# amount and its currency symbol
+FIELDS = ["title", "price", "currency", "rating", "availability", "upc", "description", "link"]
+PRICE_RE = re.compile(r"([^\d.]*)([\d.]+)")
+
+def book_record(book):
+    record = {field: book.get(field) for field in FIELDS}
+    match = PRICE_RE.search(book["price"])
+    if match:
+        record["currency"] = match.group(1).strip() or None
+        record["price"] = Decimal(match.group(2))
+    return record
+
+# Sinks stream records to a file or database as they are scraped. Records are
+# buffered and written in batches, so memory use does not grow with the crawl.
+# The on_written callback of a record runs once its batch has been written.
+class Sink:
+    def __init__(self, path, batch_size=SINK_BATCH_SIZE):
+        self.path = path
+        self.batch_size = batch_size
+        self.buffer = []
+        self.callbacks = []
+        self.written = 0
+
+    def write(self, book, on_written=None):
+        self.buffer.append(book_record(book))
+        if on_written:
+            self.callbacks.append(on_written)
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            self.write_batch(self.buffer)
+            self.written += len(self.buffer)
+            self.buffer = []
+        callbacks, self.callbacks = self.callbacks, []
+        for callback in callbacks:
+            callback()
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class JsonLinesSink(Sink):
+    def __init__(self, path, **kwargs):
+        super().__init__(path, **kwargs)
+        self.file = open(path, "a", encoding="utf-8")
+
+    def write_batch(self, records):
+        # Prices are written as strings so that no precision is lost
+        self.file.write("".join(json.dumps(record, default=str, ensure_ascii=False) + "\n" for record in records))
+        self.file.flush()
+
+    def close(self):
+        super().close()
+        self.file.close()
+
+class CsvSink(Sink):
+    def __init__(self, path, **kwargs):
+        super().__init__(path, **kwargs)
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        self.file = open(path, "a", encoding="utf-8", newline="")
+        self.writer = csv.DictWriter(self.file, fieldnames=FIELDS)
+        if new_file:
+            self.writer.writeheader()
+
+    def write_batch(self, records):
+        self.writer.writerows(records)
+        self.file.flush()
+
+    def close(self):
+        super().close()
+        self.file.close()
+
+class ParquetSink(Sink):
+    # Each batch becomes one row group. A Parquet file cannot be appended to,
+    # so if path exists the books go to a new timestamped file beside it
+    # rather than replacing the output of an earlier crawl.
+    def __init__(self, path, **kwargs):
+        root, ext = os.path.splitext(path)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        attempt = 0
+        while os.path.exists(path):
+            attempt += 1
+            path = f"{root}-{stamp}{ext}" if attempt == 1 else f"{root}-{stamp}-{attempt}{ext}"
+        super().__init__(path, **kwargs)
+        self.schema = pa.schema([
+            ("title", pa.string()), ("price", pa.decimal128(12, 2)), ("currency", pa.string()),
+            ("rating", pa.int8()), ("availability", pa.string()), ("upc", pa.string()),
+            ("description", pa.string()), ("link", pa.string()),
+        ])
+        self.writer = pq.ParquetWriter(path, self.schema)
+
+    def write_batch(self, records):
+        self.writer.write_table(pa.Table.from_pylist(records, schema=self.schema))
+
+    def close(self):
+        super().close()
+        self.writer.close()
+
+class SqliteSink(Sink):
+    # Books are keyed by link, so a re-crawl updates changed books in place
+    def __init__(self, path, **kwargs):
+        super().__init__(path, **kwargs)
+        self.db = sqlite3.connect(path)
+        with self.db:
+            self.db.execute("""CREATE TABLE IF NOT EXISTS books (
+                link TEXT PRIMARY KEY, title TEXT, price TEXT, currency TEXT, rating INTEGER,
+                availability TEXT, upc TEXT, description TEXT, scraped_at REAL)""")
+
+    def write_batch(self, records):
+        now = time.time()
+        with self.db:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO books VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(record["link"], record["title"], None if record["price"] is None else str(record["price"]),
+                  record["currency"], record["rating"], record["availability"], record["upc"],
+                  record["description"], now) for record in records])
+
+    def close(self):
+        super().close()
+        self.db.close()
+
+SINKS = {"jsonl": JsonLinesSink, "csv": CsvSink, "sqlite": SqliteSink}
+if pa is not None:
+    SINKS["parquet"] = ParquetSink
+
+SINK_EXTENSIONS = {".jsonl": "jsonl", ".json": "jsonl", ".csv": "csv", ".parquet": "parquet",
+                   ".db": "sqlite", ".sqlite": "sqlite", ".sqlite3": "sqlite"}
+
+def open_sink(path, output_format=None):
+    output_format = output_format or SINK_EXTENSIONS.get(os.path.splitext(path)[1].lower())
+    if output_format not in SINKS:
+        raise ValueError(f"Cannot write {path!r}: choose one of {', '.join(sorted(SINKS))} with --format")
+    return SINKS[output_format](path)
+
+class CrawlStats:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.pages = 0
+        self.failures = 0
+        self.unchanged = 0
+        self.downloaded = 0
+        self.disallowed = 0
+
+    def pages_per_sec(self):
+        return self.pages / max(time.perf_counter() - self.start, 1e-9)
+
+    def summary(self):
+        elapsed = time.perf_counter() - self.start
+        return (f"Crawled {self.pages} pages in {elapsed:.1f}s ({self.pages_per_sec():.1f} pages/sec), "
+                f"{self.failures} failed, {self.disallowed} disallowed by robots.txt, "
+                f"{self.unchanged} unchanged books skipped, "
+                f"{self.downloaded / 1e6:.1f} MB downloaded")
+
+# Cache the response of a book's detail page and close its frontier entry
+def page_done(cache, frontier, page_url, entry):
+    if entry:
+        cache.store(entry)
+    frontier.finish(page_url)
+
+# Crawl the catalogue from start_url, following the "next" links of the listing
+# pages and the detail link of every book. Pages are fetched and parsed on a
+# thread pool; each book is yielded in the calling thread once its detail page
+# has been fetched, so output never interleaves. With a cache only new books
+# and books whose detail page changed are yielded, unless changed_only is False.
+# If the frontier still holds pages of an interrupted crawl, that crawl is
+# resumed instead of starting again from start_url.
+# Each book is yielded with a done() callback for the caller to run once the
+# book has been written out. Only then are its response cached and its page
+# marked done, so a book lost from an unflushed buffer is emitted again by the
+# next run instead of being taken for unchanged.
+def crawl(start_url=url, stats=None, max_workers=MAX_WORKERS, parser=DEFAULT_PARSER, cache=None, changed_only=True,
+          frontier=None, rate=REQUESTS_PER_SECOND):
+    stats = stats or CrawlStats()
+    frontier = frontier or Frontier(":memory:")
+    session = make_session(max_workers, rate)
+    robots = RobotsRules(session)
+    if not frontier.has_pending():
+        frontier.reset()
+        frontier.add(start_url, "listing")
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = {}
+        while True:
+            while len(pending) < MAX_PENDING:
+                batch = frontier.take(MAX_PENDING - len(pending))
+                if not batch:
+                    break
+                for page_url, kind, book in batch:
+                    if not robots.allowed(page_url):
+                        stats.disallowed += 1
+                        frontier.finish(page_url, "disallowed")
+                    elif kind == "detail":
+                        pending[executor.submit(fetch_detail, session, book, parser, cache)] = page_url
+                    else:
+                        pending[executor.submit(fetch_listing, session, page_url, parser, cache)] = page_url
+            if not pending:
+                break
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                page_url = pending.pop(future)
+                try:
+                    result = future.result()
+                except requests.RequestException as err:
+                    stats.failures += 1
+                    frontier.finish(page_url, "failed")
+                    print(f"Failed to fetch {page_url}: {err}")
+                    continue
+                stats.pages += 1
+
+                if result[0] == "detail":
+                    _, book, changed, size, entry = result
+                    stats.downloaded += size
+                    if changed or not changed_only:
+                        yield book, partial(page_done, cache, frontier, page_url, entry)
+                    else:
+                        stats.unchanged += 1
+                        page_done(cache, frontier, page_url, entry)
+                    continue
+
+                _, books, next_url, size = result
+                stats.downloaded += size
+                found = [(book["link"], "detail", book) for book in books]
+                if next_url:
+                    found.append((next_url, "listing", None))
+                frontier.add_many(found)
+                frontier.finish(page_url)
+    session.close()
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Scrape the books.toscrape.com catalogue")
+    arg_parser.add_argument("--url", default=url, help="first listing page")
+    arg_parser.add_argument("--workers", type=int, default=MAX_WORKERS)
+    arg_parser.add_argument("--parser", choices=sorted(PARSERS), default=DEFAULT_PARSER)
+    arg_parser.add_argument("--cache", default=HTTP_CACHE_PATH, help="SQLite file for the HTTP cache")
+    arg_parser.add_argument("--no-cache", action="store_true", help="download every page and emit every book")
+    arg_parser.add_argument("--all", action="store_true", help="emit unchanged books too")
+    arg_parser.add_argument("--rate", type=float, default=REQUESTS_PER_SECOND, help="requests per second per host")
+    arg_parser.add_argument("--frontier", default=FRONTIER_PATH, help="SQLite file used to resume interrupted crawls")
+    arg_parser.add_argument("--no-resume", action="store_true", help="start from --url and keep no frontier")
+    arg_parser.add_argument("--output", help="write books to this file instead of printing them "
+                                             "(.jsonl, .csv, .parquet or .db); an existing file is appended to, "
+                                             "except Parquet, which gets a new timestamped file beside it")
+    arg_parser.add_argument("--format", choices=sorted(SINKS), help="output format, if not given by the extension")
+    arg_parser.add_argument("--benchmark-parsers", nargs="+", metavar="HTML_FILE",
+                            help="compare the parser backends on saved pages instead of crawling")
+    arg_parser.add_argument("--repeat", type=int, default=5, help="benchmark repetitions")
+    args = arg_parser.parse_args()
+    if args.rate <= 0:
+        arg_parser.error("--rate must be greater than 0")
+
+    if args.benchmark_parsers:
+        benchmark_parsers(args.benchmark_parsers, args.repeat)
+        raise SystemExit
+
+    frontier = Frontier(":memory:" if args.no_resume else args.frontier)
+    sink = open_sink(args.output, args.format) if args.output else None
+    cache = None if args.no_cache else HttpCache(args.cache)
+    stats = CrawlStats()
+    try:
+        for book, done in crawl(args.url, stats, args.workers, args.parser, cache, not args.all, frontier,
+                                args.rate):
+            if sink:
+                sink.write(book, done)
+                continue
+            # Print the book's details
+            print(f"Title: {book['title']}")
+            print(f"Price: {book['price']}")
+            print(f"Rating: {book['rating']}")
+            print(f"Availability: {book['availability']}")
+            print(f"Link: {book['link']}")
+            print("-" * 50)
+            done()
+    except KeyboardInterrupt:
+        if not args.no_resume:
+            print(f"Interrupted; run again to resume from {args.frontier}")
+    finally:
+        if sink:
+            sink.close()
+            print(f"Wrote {sink.written} books to {sink.path}")
+        if cache:
+            cache.close()
+        frontier.close()
+    print(stats.summary())